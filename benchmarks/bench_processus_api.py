@@ -0,0 +1,170 @@
+"""Mesure l'effet de la charge API sur la régularité de la boucle de contrôle.
+
+Compare trois configurations: boucle seule, API Flask dans un thread du même
+processus, et API dans un processus séparé lisant l'état partagé. Pour chacune,
+on rapporte le retard de réveil de la boucle et la durée de calcul d'un tick
+(p50, p99, max) pendant que des clients HTTP sollicitent l'API en continu.
+Sur un seul cœur, les deux configurations se partagent le même processeur:
+l'isolement ne se mesure que sur une machine multicœur comme le Pi Zero 2W.
+
+Usage: python -m benchmarks.bench_processus_api [--duree 10] [--clients 4]
+"""
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import statistics
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from werkzeug.serving import make_server
+
+from controllers.api_controller import ControleurAPI
+from services.etat_partage_service import ÉtatPartagé, SerreDistante
+
+PÉRIODE = 0.02
+PORT_THREAD = 5101
+PORT_PROCESSUS = 5102
+
+
+def _état_exemple(i: int) -> Dict:
+    return {
+        "temperature": f"{20 + (i % 50) / 10:.1f}",
+        "humidite": "55.0",
+        "pression": "1013.2",
+        "chauffage": i % 2 == 0,
+        "eclairage": True,
+        "ventilation": False,
+        "brumisation": False,
+        "mode_securite": False,
+        "statistiques": {"temperature": {"ewma": 21.0, "min": 19.5, "max": 23.0, "pente_par_min": 0.1}},
+        "erreur": None,
+    }
+
+
+class SerreFactice:
+    def __init__(self):
+        self.état = _état_exemple(0)
+
+    def obtenir_état(self) -> Dict:
+        return self.état
+
+
+def _travail_tick(état: Dict) -> None:
+    for _ in range(50):
+        json.dumps(état)
+
+
+def _boucle(durée: float, à_chaque_tick) -> Tuple[List[float], List[float]]:
+    retards, durées = [], []
+    échéance = time.perf_counter()
+    fin = échéance + durée
+    i = 0
+    while échéance < fin:
+        échéance += PÉRIODE
+        début = time.perf_counter()
+        à_chaque_tick(i)
+        durées.append(time.perf_counter() - début)
+        i += 1
+        attente = échéance - time.perf_counter()
+        if attente > 0:
+            time.sleep(attente)
+        retards.append(max(0.0, time.perf_counter() - échéance))
+    return retards, durées
+
+
+def _client(port: int, arrêt) -> None:
+    while not arrêt.is_set():
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/api/serre")
+            conn.getresponse().read()
+            conn.close()
+        except OSError:
+            time.sleep(0.01)
+
+
+def _serveur_processus(nom_état: str, port: int) -> None:
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    état = ÉtatPartagé(nom=nom_état)
+    api = ControleurAPI(SerreDistante(état, None))
+    make_server("127.0.0.1", port, api.app, threaded=True).serve_forever()
+
+
+def _charge(port: int, clients: int):
+    contexte = multiprocessing.get_context("spawn")
+    arrêt = contexte.Event()
+    processus = [contexte.Process(target=_client, args=(port, arrêt)) for _ in range(clients)]
+    for p in processus:
+        p.start()
+    return arrêt, processus
+
+
+def _fin_charge(arrêt, processus) -> None:
+    arrêt.set()
+    for p in processus:
+        p.join(timeout=5)
+
+
+def _percentiles(valeurs: List[float]) -> str:
+    valeurs = sorted(valeurs)
+    p99 = valeurs[int(len(valeurs) * 0.99) - 1]
+    return (
+        f"p50={statistics.median(valeurs) * 1000:6.3f} p99={p99 * 1000:6.3f} "
+        f"max={valeurs[-1] * 1000:6.3f} ms"
+    )
+
+
+def _résumé(nom: str, mesures: Tuple[List[float], List[float]]) -> None:
+    retards, durées = mesures
+    print(f"{nom:<22} retard {_percentiles(retards)} | tick {_percentiles(durées)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duree", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=4)
+    args = parser.parse_args()
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    serre = SerreFactice()
+
+    def tick_local(i: int) -> None:
+        serre.état = _état_exemple(i)
+        _travail_tick(serre.état)
+
+    _résumé("sans charge", _boucle(args.duree, tick_local))
+
+    api = ControleurAPI(serre)
+    serveur = make_server("127.0.0.1", PORT_THREAD, api.app, threaded=True)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    arrêt, clients = _charge(PORT_THREAD, args.clients)
+    time.sleep(1)
+    _résumé("API dans un thread", _boucle(args.duree, tick_local))
+    _fin_charge(arrêt, clients)
+    serveur.shutdown()
+
+    état = ÉtatPartagé()
+    état.publier(serre.état)
+    contexte = multiprocessing.get_context("spawn")
+    serveur_api = contexte.Process(target=_serveur_processus, args=(état.nom, PORT_PROCESSUS), daemon=True)
+    serveur_api.start()
+    arrêt, clients = _charge(PORT_PROCESSUS, args.clients)
+    time.sleep(1)
+
+    def tick_partagé(i: int) -> None:
+        serre.état = _état_exemple(i)
+        _travail_tick(serre.état)
+        état.publier(serre.état)
+
+    _résumé("API dans un processus", _boucle(args.duree, tick_partagé))
+    _fin_charge(arrêt, clients)
+    serveur_api.terminate()
+    serveur_api.join(timeout=5)
+    état.fermer()
+
+
+if __name__ == "__main__":
+    main()
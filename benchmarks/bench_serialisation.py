@@ -0,0 +1,113 @@
+"""Octets transmis et temps processeur par réponse selon l'encodage et la compression.
+
+Trois charges représentatives: l'état d'une serre, le statut d'une flotte de
+500 serres et le détail d'une serre avec sa série (720 points). Pour chacune,
+on compare jsonify, l'encodeur compact et MessagePack (si installé), puis les
+codages de contenu négociables à plusieurs niveaux. Les temps sont ceux de la
+machine qui exécute le script: à relancer sur le Pi pour les chiffres de référence.
+
+Usage: python -m benchmarks.bench_serialisation [--repetitions 200]
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from flask import Flask, jsonify
+
+from services import serialisation_service
+from services.serialisation_service import EncodeurJSON, FragmentJSON, compresser, ENCODAGES
+
+
+def _état(i: int) -> Dict[str, Any]:
+    return {
+        "temperature": f"{20 + (i % 50) / 10:.1f}",
+        "humidite": "55.0",
+        "pression": "1013.2",
+        "chauffage": i % 2 == 0,
+        "eclairage": True,
+        "ventilation": False,
+        "brumisation": False,
+        "derniere_mise_a_jour": "2024-06-01T12:00:00.123456",
+        "mode_securite": False,
+        "statistiques": {
+            "temperature": {"ewma": 21.04, "min": 19.5, "max": 23.0, "pente_par_min": 0.012},
+            "humidite": {"ewma": 55.2, "min": 50.1, "max": 61.3, "pente_par_min": -0.04},
+        },
+        "baux": {},
+        "erreur": None,
+    }
+
+
+def _flotte() -> Dict[str, Any]:
+    serres = {
+        f"10.0.{i // 256}.{i % 256}:5000": {
+            "en_ligne": True,
+            "temperature": f"{18 + (i % 80) / 10:.1f}",
+            "humidite": f"{50 + (i % 20):.1f}",
+            "mode_securite": False,
+            "derniere_reussite": 1717243200.0 + i,
+            "echecs_consecutifs": 0,
+            "derniere_erreur": None,
+            "latence_ms": 12.3,
+        }
+        for i in range(500)
+    }
+    return {"total": 500, "en_ligne": 500, "mode_securite": 0, "serres": serres}
+
+
+def _détail() -> Dict[str, Any]:
+    return {
+        "en_ligne": True,
+        "temperature": "21.0",
+        "etat": FragmentJSON(json.dumps(_état(0), separators=(",", ":")).encode()),
+        "serie": [
+            {"horodatage": 1717243200.0 + 60 * i, "temperature": 20 + (i % 60) / 10, "humidite": 55.0}
+            for i in range(720)
+        ],
+    }
+
+
+def _mesurer(fonction: Callable[[], bytes], répétitions: int) -> Tuple[int, float]:
+    taille = len(fonction())
+    début = time.process_time()
+    for _ in range(répétitions):
+        fonction()
+    return taille, (time.process_time() - début) / répétitions * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Banc d'essai sérialisation et compression")
+    parser.add_argument("--repetitions", type=int, default=200)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    encodeur = EncodeurJSON()
+    charges = {"etat": _état(3), "flotte (500)": _flotte(), "detail (720 pts)": _détail()}
+
+    for nom, charge in charges.items():
+        print(f"\n== {nom}")
+        sans_fragments = serialisation_service._sans_fragments(charge)
+        encodages: Dict[str, Callable[[], bytes]] = {
+            "jsonify": lambda: jsonify(sans_fragments).get_data(),
+            "encodeur compact": lambda: encodeur.encoder(charge),
+        }
+        if serialisation_service.msgpack is not None:
+            encodages["msgpack"] = lambda: serialisation_service.encoder_msgpack(charge)
+
+        with app.test_request_context():
+            lignes: List[Tuple[str, int, float]] = []
+            for libellé, fonction in encodages.items():
+                lignes.append((libellé, *_mesurer(fonction, args.repetitions)))
+            corps = encodeur.encoder(charge)
+            for encodage in ENCODAGES:
+                for niveau in (1, 6, 9):
+                    taille, durée = _mesurer(lambda: compresser(corps, encodage, niveau), args.repetitions)
+                    lignes.append((f"  + {encodage} niveau {niveau}", taille, durée))
+
+        for libellé, taille, durée in lignes:
+            print(f"{libellé:<24} {taille:>8} o {durée:>10.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,14 @@ from dataclasses import dataclass
 BASE_DIR: Final[Path] = Path(__file__).parent
 LOG_DIR: Final[Path] = Path("/var/log/serre")
 PID_FILE: Final[Path] = Path("/var/log/serre/serre.pid")
+DATA_DIR: Final[Path] = Path("/var/lib/serre")
+
+JOURNAUX_CONFIG: Final[Dict[str, str]] = {
+    'taille_max': "1000000",
+    'sauvegardes': "5",
+    'limite_page': "100",
+    'limite_page_max': "1000",
+}
 
 # Configuration des GPIO
 GPIO_CONFIG: Final[Dict[str, int]] = {
@@ -15,6 +23,36 @@ GPIO_CONFIG: Final[Dict[str, int]] = {
     'ventilation': 27,
 }
 
+RELAIS_CONFIG: Final[Dict[str, str]] = {
+    'duree_bail_max': "3600",
+}
+
+# Prévision à court terme de la température (durées en secondes)
+PREVISION_CONFIG: Final[Dict[str, str]] = {
+    'anticipation': "true",
+    'horizon': "2700",
+    'fenetre': "172800",
+    'periode_ajustement': "600",
+    'retard_tendance': "900",
+    'tolerance': "90",
+    'echantillons_min': "360",
+}
+
+# Âge maximal (s) du point de reprise pour un redémarrage à chaud
+REPRISE_CONFIG: Final[Dict[str, str]] = {
+    'age_max': "300",
+}
+
+# Puissance consommée par relais (W) et profondeur des séries de rapport cyclique
+ENERGIE_CONFIG: Final[Dict[str, str]] = {
+    'puissance_chauffage': "2000",
+    'puissance_eclairage': "400",
+    'puissance_brumisation': "60",
+    'puissance_ventilation': "45",
+    'heures': "48",
+    'jours': "31",
+}
+
 @dataclass(frozen=True)
 class SeuilsEnvironnementaux:
     TEMP_MAX: float = 25.0
@@ -46,14 +84,53 @@ SEUILS_ENVIRONNEMENT: Final[Dict[str, float]] = {
     'humid_normale': SEUILS.HUMID_NORMALE,
 }
 
+STATISTIQUES_CONFIG: Final[Dict[str, str]] = {
+    'alpha_ewma': "0.2",
+    'fenetre_min_max': "3600",
+    'fenetre_pente': "600",
+    'echantillons_min_pente': "3",
+    'seuil_variation_temp': "3.0",
+}
+
+WATCHDOG_CONFIG: Final[Dict[str, str]] = {
+    'periode_boucle': "60",
+    'echeance_cycle': "20",
+    'marge': "30",
+}
+
+HISTORIQUE_CONFIG: Final[Dict[str, str]] = {
+    'taille_bloc': "4096",
+}
+
+MEMOIRE_CONFIG: Final[Dict[str, str]] = {
+    'budget_mo': "200",
+    'intervalle_journal': "600",
+    # Taille minimale d'un tampon réduit, et hausse du RSS (Mo) justifiant une nouvelle réduction
+    'taille_min_tampon': "32",
+    'marge_reduction_mo': "5",
+    'trames_tracemalloc': "10",
+    # Arrêt automatique de tracemalloc (s) après le dernier instantané
+    'duree_tracemalloc': "900",
+    'top': "20",
+}
+
 HORAIRES: Final[Dict[str, int]] = {
     'heure_debut_jour': 6,
     'heure_fin_jour': 22,
 }
 
+MATERIEL_CONFIG: Final[Dict[str, str]] = {
+    'gpio': "reel",
+    'capteur': "esp32",
+    'enregistrer': "false",
+}
+
 ESP32_CONFIG: Final[Dict[str, str]] = {
     'url': "http://adresse_IP_du_ESP32/donnees",
     'timeout': "5",
+    'ttl_lecture': "5",
+    'peremption_lecture': "120",
+    'delai_lecture_lente': "1",
 }
 
 PUSHOVER_CONFIG: Final[Dict[str, str]] = {
@@ -62,7 +139,30 @@ PUSHOVER_CONFIG: Final[Dict[str, str]] = {
     'delai_min_alerte': "30",
 }
 
+LIMITATION_CONFIG: Final[Dict[str, str]] = {
+    'rafale': "1",
+    'fenetre_resume': "3600",
+    'max_types': "64",
+    'max_evenements': "256",
+}
+
 API_CONFIG: Final[Dict[str, str]] = {
     'host': "0.0.0.0",
     'port': "5000",
-}
\ No newline at end of file
+    'processus_separe': "false",
+    'taille_etat_partage': "65536",
+    'seuil_compression': "1024",
+    'niveau_compression': "6",
+}
+
+FLOTTE_CONFIG: Final[Dict[str, str]] = {
+    'hotes': "",
+    'chemin': "/api/serre",
+    'intervalle': "60",
+    'timeout': "5",
+    'gigue': "0.2",
+    'concurrence_max': "512",
+    'taille_serie': "1440",
+    'host': "0.0.0.0",
+    'port': "5001",
+}
@@ -1,18 +1,32 @@
-from flask import Flask, jsonify, Response
+from flask import Flask, Response, request, stream_with_context
 from flask_cors import CORS
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional
+import hashlib
+import json
 import logging
-from config import API_CONFIG
+from models.exceptions import ErreurValidation, ErreurConfiguration, ErreurRelais
+from models.bail_relais import valider_durée
+from services.historique_service import HistoriqueSerre, analyser_intervalle
+from services.memoire_service import ServiceMémoire
+from services.logging_service import IndexJournaux
+from services.serialisation_service import répondre, installer_compression
+from config import API_CONFIG, GPIO_CONFIG, RELAIS_CONFIG
 
 app = Flask(__name__)
 CORS(app)
 
 class ControleurAPI:
-    def __init__(self, serre_controller, app=None):
+    def __init__(self, serre_controller, app=None, historique: Optional[HistoriqueSerre] = None,
+                 mémoire: Optional[ServiceMémoire] = None,
+                 journaux: Optional[IndexJournaux] = None):
         self.logger = logging.getLogger("serre.api")
         self.serre = serre_controller
+        self.historique = historique or HistoriqueSerre()
+        self.mémoire = mémoire or ServiceMémoire()
+        self.journaux = journaux or IndexJournaux()
         self.app = app or Flask(__name__)
         CORS(self.app)
+        installer_compression(self.app)
         self._configurer_routes()
 
     def _configurer_routes(self) -> None:
@@ -22,14 +36,205 @@ class ControleurAPI:
             self.état_serre,
             methods=['GET']
         )
+        self.app.add_url_rule(
+            '/api/serre/relais/<nom>',
+            'forcer_relais',
+            self.forcer_relais,
+            methods=['POST']
+        )
+        self.app.add_url_rule(
+            '/api/serre/relais/<nom>',
+            'libérer_relais',
+            self.libérer_relais,
+            methods=['DELETE']
+        )
+        self.app.add_url_rule(
+            '/api/serre/memoire',
+            'mémoire',
+            self.statistiques_mémoire,
+            methods=['GET']
+        )
+        self.app.add_url_rule(
+            '/api/serre/memoire/instantane',
+            'instantané_mémoire',
+            self.instantané_mémoire,
+            methods=['POST']
+        )
+        self.app.add_url_rule(
+            '/api/serre/memoire/instantane',
+            'arrêt_traçage_mémoire',
+            self.arrêt_traçage_mémoire,
+            methods=['DELETE']
+        )
+        self.app.add_url_rule(
+            '/api/serre/memoire/diff',
+            'diff_mémoire',
+            self.diff_mémoire,
+            methods=['GET']
+        )
+        self.app.add_url_rule(
+            '/api/serre/export',
+            'export_historique',
+            self.export_historique,
+            methods=['GET']
+        )
+        self.app.add_url_rule(
+            '/api/serre/energie',
+            'énergie',
+            self.énergie_relais,
+            methods=['GET']
+        )
+        self.app.add_url_rule(
+            '/api/serre/metriques',
+            'métriques',
+            self.métriques,
+            methods=['GET']
+        )
+        self.app.add_url_rule(
+            '/api/serre/journaux',
+            'journaux',
+            self.rechercher_journaux,
+            methods=['GET']
+        )
 
     def état_serre(self) -> Tuple[Response, int]:
         try:
-            état = self.serre.obtenir_état()
-            return jsonify(état), 200
+            if request.args.get("frais") in ("1", "true"):
+                état = self.serre.obtenir_état(frais=True)
+            else:
+                état = self.serre.obtenir_état()
+            réponse = répondre(état)
+            if not état.get("erreur"):
+                réponse.set_etag(self._etag(état))
+                réponse.make_conditional(request)
+            return réponse, réponse.status_code
         except Exception as e:
             self.logger.error(f"Erreur API: {str(e)}")
-            return jsonify({
+            return répondre({
+                "erreur": "Erreur serveur",
+                "detail": str(e)
+            }), 500
+
+    def forcer_relais(self, nom: str) -> Tuple[Response, int]:
+        try:
+            if nom not in GPIO_CONFIG:
+                return répondre({"erreur": f"Relais inconnu: {nom}"}), 404
+            corps = request.get_json(silent=True) or {}
+            activer = corps.get("etat")
+            durée = corps.get("duree")
+            if not isinstance(activer, bool):
+                raise ErreurValidation("Le champ 'etat' doit être un booléen")
+            if isinstance(durée, bool) or not isinstance(durée, (int, float)):
+                raise ErreurValidation("Le champ 'duree' doit être un nombre de secondes")
+            # Vérifiée ici aussi: en mode processus séparé, un refus du contrôle ne remonterait pas
+            valider_durée(float(durée), float(RELAIS_CONFIG['duree_bail_max']))
+            bail = self.serre.forcer_relais(nom, activer, float(durée))
+            if bail is None:
+                # Commande transmise au processus de contrôle
+                return répondre({"relais": nom, "etat": activer, "duree": durée}), 202
+            return répondre({"relais": nom, **bail.to_dict()}), 200
+        except (ErreurValidation, ErreurRelais) as e:
+            return répondre({"erreur": "Requête invalide", "detail": str(e)}), 400
+        except ErreurConfiguration as e:
+            return répondre({"erreur": "Contrôle indisponible", "detail": str(e)}), 503
+        except Exception as e:
+            self.logger.error(f"Erreur forçage relais {nom}: {str(e)}")
+            return répondre({
+                "erreur": "Erreur serveur",
+                "detail": str(e)
+            }), 500
+
+    def libérer_relais(self, nom: str) -> Tuple[Response, int]:
+        if nom not in GPIO_CONFIG:
+            return répondre({"erreur": f"Relais inconnu: {nom}"}), 404
+        try:
+            self.serre.libérer_relais(nom)
+        except ErreurConfiguration as e:
+            return répondre({"erreur": "Contrôle indisponible", "detail": str(e)}), 503
+        return répondre({"relais": nom}), 200
+
+    def statistiques_mémoire(self) -> Tuple[Response, int]:
+        return répondre(self.mémoire.statistiques()), 200
+
+    def instantané_mémoire(self) -> Tuple[Response, int]:
+        top = request.args.get('top', type=int)
+        return répondre({"top": self.mémoire.instantané(top)}), 200
+
+    def arrêt_traçage_mémoire(self) -> Tuple[Response, int]:
+        self.mémoire.arrêter_traçage()
+        return répondre({"tracemalloc": False}), 200
+
+    def diff_mémoire(self) -> Tuple[Response, int]:
+        top = request.args.get('top', type=int)
+        return répondre({"diff": self.mémoire.diff(top)}), 200
+
+    @staticmethod
+    def _etag(état: Dict[str, Any]) -> str:
+        """Version de l'instantané publié, ou à défaut empreinte de l'état hors horodatage."""
+        if "version" in état and "generation" in état:
+            return f"{état['generation']}-{état['version']}"
+        contenu = {clé: valeur for clé, valeur in état.items() if clé != "derniere_mise_a_jour"}
+        return hashlib.sha1(json.dumps(contenu, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def export_historique(self) -> Tuple[Response, int]:
+        try:
+            début, fin = analyser_intervalle(request.args.get('debut'), request.args.get('fin'))
+            format_export = request.args.get('format', 'csv')
+            if format_export == 'csv':
+                flux = self.historique.exporter_csv_gzip(début, fin)
+                mimetype, extension = "application/gzip", "csv.gz"
+            elif format_export == 'arrow':
+                flux = self.historique.exporter_arrow(début, fin)
+                mimetype, extension = "application/vnd.apache.arrow.stream", "arrows"
+            else:
+                raise ErreurValidation(f"Format d'export inconnu: {format_export}")
+            entêtes = {"Content-Disposition": f"attachment; filename=serre.{extension}"}
+            return Response(stream_with_context(flux), mimetype=mimetype, headers=entêtes), 200
+        except ErreurValidation as e:
+            return répondre({"erreur": "Requête invalide", "detail": str(e)}), 400
+        except ErreurConfiguration as e:
+            return répondre({"erreur": "Format non disponible", "detail": str(e)}), 501
+        except Exception as e:
+            self.logger.error(f"Erreur export: {str(e)}")
+            return répondre({
+                "erreur": "Erreur serveur",
+                "detail": str(e)
+            }), 500
+
+    def énergie_relais(self) -> Tuple[Response, int]:
+        try:
+            return répondre(self.serre.énergie_relais()), 200
+        except Exception as e:
+            self.logger.error(f"Erreur compteurs énergie: {str(e)}")
+            return répondre({
+                "erreur": "Erreur serveur",
+                "detail": str(e)
+            }), 500
+
+    def métriques(self) -> Tuple[Response, int]:
+        try:
+            return Response(self.serre.métriques(), mimetype="text/plain; version=0.0.4"), 200
+        except Exception as e:
+            self.logger.error(f"Erreur métriques: {str(e)}")
+            return Response(f"# erreur: {str(e)}\n", mimetype="text/plain"), 500
+
+    def rechercher_journaux(self) -> Tuple[Response, int]:
+        try:
+            page = self.journaux.rechercher(
+                niveau=request.args.get('niveau'),
+                depuis=request.args.get('depuis'),
+                contient=request.args.get('contient'),
+                logger=request.args.get('logger'),
+                évènement=request.args.get('evenement'),
+                limite=request.args.get('limite', type=int),
+                curseur=request.args.get('curseur')
+            )
+            return répondre(page), 200
+        except ErreurValidation as e:
+            return répondre({"erreur": "Requête invalide", "detail": str(e)}), 400
+        except Exception as e:
+            self.logger.error(f"Erreur recherche journaux: {str(e)}")
+            return répondre({
                 "erreur": "Erreur serveur",
                 "detail": str(e)
             }), 500
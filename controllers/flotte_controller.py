@@ -0,0 +1,52 @@
+from flask import Flask, Response
+from flask_cors import CORS
+from typing import Tuple
+import logging
+from services.serialisation_service import répondre, installer_compression
+from config import FLOTTE_CONFIG
+
+
+class ControleurFlotte:
+    def __init__(self, agrégateur, app=None):
+        self.logger = logging.getLogger("serre.flotte.api")
+        self.agrégateur = agrégateur
+        self.app = app or Flask(__name__)
+        CORS(self.app)
+        installer_compression(self.app)
+        self._configurer_routes()
+
+    def _configurer_routes(self) -> None:
+        self.app.add_url_rule(
+            '/api/flotte',
+            'statut_flotte',
+            self.statut_flotte,
+            methods=['GET']
+        )
+        self.app.add_url_rule(
+            '/api/flotte/<hote>',
+            'détail_serre',
+            self.détail_serre,
+            methods=['GET']
+        )
+
+    def statut_flotte(self) -> Tuple[Response, int]:
+        try:
+            return répondre(self.agrégateur.statut_flotte()), 200
+        except Exception as e:
+            self.logger.error(f"Erreur API flotte: {str(e)}")
+            return répondre({
+                "erreur": "Erreur serveur",
+                "detail": str(e)
+            }), 500
+
+    def détail_serre(self, hote: str) -> Tuple[Response, int]:
+        détail = self.agrégateur.détail_hôte(hote)
+        if détail is None:
+            return répondre({"erreur": f"Serre inconnue: {hote}"}), 404
+        return répondre(détail), 200
+
+    def démarrer(self) -> None:
+        self.app.run(
+            host=FLOTTE_CONFIG['host'],
+            port=int(FLOTTE_CONFIG['port'])
+        )
@@ -1,41 +1,159 @@
+import secrets
 import threading
 from typing import Optional, Dict, Any
 from datetime import datetime, time as dtime
 import logging
-import RPi.GPIO as GPIO
 from models.donnees_environnement import DonnéesEnvironnement
 from models.exceptions import ErreurRelais, ErreurCapteur
+from models.bail_relais import BailRelais, RegistreBaux
+from models.instantane_etat import InstantanéÉtat, figer
 from services.pushover_service import ServicePushover, NotificationMessage
 from services.systemd_service import ServiceSystemd
-from config import GPIO_CONFIG, SEUILS_ENVIRONNEMENT, HORAIRES, ESP32_CONFIG
+from services.statistiques_service import ServiceStatistiques
+from services.historique_service import HistoriqueSerre
+from services.materiel_service import créer_gpio, créer_capteur
+from services.cache_service import CacheLectureUnique
+from services.energie_service import ServiceÉnergie
+from services.reprise_service import PointDeReprise
+from services.prevision_service import ServicePrévision
+from config import (
+    GPIO_CONFIG, SEUILS_ENVIRONNEMENT, HORAIRES, STATISTIQUES_CONFIG, RELAIS_CONFIG, ESP32_CONFIG,
+    DATA_DIR
+)
 
 class ControleurSerre:
-    def __init__(self):
+    def __init__(self, gpio=None, capteur=None, pushover: Optional[ServicePushover] = None,
+                 systemd: Optional[ServiceSystemd] = None,
+                 historique: Optional[HistoriqueSerre] = None,
+                 cache_lecture: Optional[CacheLectureUnique] = None,
+                 énergie: Optional[ServiceÉnergie] = None,
+                 reprise: Optional[PointDeReprise] = None,
+                 prévision: Optional[ServicePrévision] = None):
         self.logger = logging.getLogger("serre.controller")
-        self.pushover = ServicePushover()
-        self.systemd = ServiceSystemd(cleanup_handler=self.nettoyer)
+        self.gpio = gpio or créer_gpio()
+        self.capteur = capteur or créer_capteur()
+        self.pushover = pushover or ServicePushover()
+        self.systemd = systemd or ServiceSystemd(gestion_nettoyage=self.nettoyer)
+        self.statistiques = ServiceStatistiques()
+        self.historique = historique or HistoriqueSerre()
+        self.cache_lecture = cache_lecture or CacheLectureUnique(
+            float(ESP32_CONFIG['ttl_lecture']),
+            float(ESP32_CONFIG['peremption_lecture']),
+            float(ESP32_CONFIG['delai_lecture_lente'])
+        )
+        self.énergie = énergie or ServiceÉnergie(fichier=DATA_DIR / "energie.bin")
+        self.reprise = reprise or PointDeReprise(DATA_DIR / "reprise.json")
+        self.prévision = prévision or ServicePrévision()
+        try:
+            self.prévision.amorcer(self.historique)
+        except Exception as e:
+            self.logger.error(f"Erreur amorçage prévision: {str(e)}")
         
         self.en_mode_sécurité = False
         self.alerte_temp_haute = False
         self.alerte_temp_basse = False
+        self.alerte_chute = False
+        self.alerte_hausse = False
         self.RELAIS_ACTIF_BAS = True
         
-        self._initialiser_gpio()
+        self.point_restauré = self.reprise.charger()
+        self._initialiser_gpio(self.point_restauré["relais"] if self.point_restauré else {})
         self._dernieres_donnees: Optional[DonnéesEnvironnement] = None
-        self._verrou = threading.Lock()
+        self._verrou = threading.RLock()
+        self.baux = RegistreBaux(float(RELAIS_CONFIG['duree_bail_max']))
+        if self.point_restauré:
+            self._restaurer(self.point_restauré)
+        self._génération = secrets.token_hex(4)
+        self._instantané: Optional[InstantanéÉtat] = None
+        self._publier()
 
-    def _initialiser_gpio(self) -> None:
+    def _initialiser_gpio(self, états: Dict[str, bool]) -> None:
+        """Configure les broches, relais éteints ou dans l'état du point de reprise."""
         try:
-            GPIO.setmode(GPIO.BCM)
-            GPIO.setwarnings(False)
+            self.gpio.setmode(self.gpio.BCM)
+            self.gpio.setwarnings(False)
             for nom_relais, pin in GPIO_CONFIG.items():
-                GPIO.setup(pin, GPIO.OUT)
-                GPIO.output(pin, GPIO.HIGH)
+                activer = bool(états.get(nom_relais, False))
+                niveau = self.gpio.HIGH if (activer != self.RELAIS_ACTIF_BAS) else self.gpio.LOW
+                self.gpio.setup(pin, self.gpio.OUT, initial=niveau)
+                self.gpio.output(pin, niveau)
+                self.énergie.reprendre(nom_relais, activer)
                 self.logger.info(f"GPIO {pin} configuré pour {nom_relais}")
         except Exception as e:
             self.logger.critical(f"Erreur fatale GPIO: {str(e)}")
             raise ErreurRelais("Échec de l'initialisation GPIO")
 
+    @property
+    def instantané(self) -> InstantanéÉtat:
+        """Dernier état publié; lecture sans verrou."""
+        return self._instantané
+
+    def _publier(self, **modifications: Any) -> None:
+        """Publie un nouvel instantané si l'état a changé (remplacement de référence).
+
+        Sans argument, l'instantané est reconstruit à partir de l'état courant;
+        sinon seuls les champs donnés changent par rapport au précédent.
+        """
+        with self._verrou:
+            précédent = self._instantané
+            version = précédent.version + 1 if précédent else 1
+            if modifications and précédent:
+                champs = {**vars(précédent), **modifications, "version": version}
+            else:
+                données = self._dernieres_donnees
+                champs = {
+                    "version": version,
+                    "génération": self._génération,
+                    "température": données.température if données else None,
+                    "humidité": données.humidité if données else None,
+                    "pression": données.pression if données else None,
+                    "relais": figer(self.états_relais()),
+                    "mode_sécurité": self.en_mode_sécurité,
+                    "statistiques": figer(self.statistiques.to_dict()),
+                    "baux": figer(self.baux.to_dict()),
+                }
+            nouveau = InstantanéÉtat(**champs)
+            if précédent is None or not précédent.même_contenu(nouveau):
+                self._instantané = nouveau
+
+    def _restaurer(self, point: Dict[str, Any]) -> None:
+        self.en_mode_sécurité = bool(point.get("mode_securite", False))
+        self.alerte_temp_haute = bool(point.get("alerte_temp_haute", False))
+        self.alerte_temp_basse = bool(point.get("alerte_temp_basse", False))
+        self.alerte_chute = bool(point.get("alerte_chute", False))
+        self.alerte_hausse = bool(point.get("alerte_hausse", False))
+        self.baux.importer(point.get("baux", {}))
+        if point.get("derniere_lecture"):
+            try:
+                self._dernieres_donnees = DonnéesEnvironnement(**point["derniere_lecture"])
+            except Exception as e:
+                self.logger.warning(f"Dernière lecture du point de reprise ignorée: {str(e)}")
+        if self.pushover.limiteur.fichier is None and point.get("limitation"):
+            self.pushover.limiteur.importer(point["limitation"])
+        self.logger.info(
+            f"État restauré: relais {point.get('relais')}, mode sécurité {self.en_mode_sécurité}"
+        )
+
+    def enregistrer_reprise(self, **supplément: Any) -> None:
+        """Écrit le point de reprise; supplément: état propre à l'application."""
+        données = self._dernieres_donnees
+        self.reprise.enregistrer({
+            "relais": self.états_relais(),
+            "mode_securite": self.en_mode_sécurité,
+            "alerte_temp_haute": self.alerte_temp_haute,
+            "alerte_temp_basse": self.alerte_temp_basse,
+            "alerte_chute": self.alerte_chute,
+            "alerte_hausse": self.alerte_hausse,
+            "derniere_lecture": {
+                "température": données.température,
+                "humidité": données.humidité,
+                "pression": données.pression,
+            } if données else None,
+            "baux": self.baux.exporter(),
+            "limitation": self.pushover.limiteur.exporter(),
+            **supplément
+        })
+
     def contrôler_relais(self, nom_relais: str, activer: bool) -> None:
         with self._verrou:
             try:
@@ -43,8 +161,9 @@ class ControleurSerre:
                     raise ErreurRelais(f"Relais inconnu: {nom_relais}")
                 
                 # Si RELAIS_ACTIF_BAS est True, on inverse l'état
-                état_gpio = GPIO.HIGH if (activer != self.RELAIS_ACTIF_BAS) else GPIO.LOW
-                GPIO.output(GPIO_CONFIG[nom_relais], état_gpio)
+                état_gpio = self.gpio.HIGH if (activer != self.RELAIS_ACTIF_BAS) else self.gpio.LOW
+                self.gpio.output(GPIO_CONFIG[nom_relais], état_gpio)
+                self.énergie.commuter(nom_relais, activer)
                 
                 self.logger.info(
                     f"Relais {nom_relais} {'activé' if activer else 'désactivé'}"
@@ -54,31 +173,52 @@ class ControleurSerre:
                 self.logger.error(f"Erreur contrôle relais {nom_relais}: {str(e)}")
                 raise ErreurRelais(f"Échec contrôle relais {nom_relais}")
 
-    def lire_capteur(self) -> Optional[DonnéesEnvironnement]:
+    def forcer_relais(self, nom_relais: str, activer: bool, durée: float) -> BailRelais:
+        """Force un relais pendant durée secondes, sans attendre la boucle de contrôle."""
+        if nom_relais not in GPIO_CONFIG:
+            raise ErreurRelais(f"Relais inconnu: {nom_relais}")
+        with self._verrou:
+            bail = self.baux.poser(nom_relais, activer, durée)
+            self.contrôler_relais(nom_relais, activer)
+            self._publier()
+        self.logger.info(
+            f"Forçage manuel {nom_relais} {'activé' if activer else 'désactivé'} pour {durée:.0f}s"
+        )
+        return bail
+
+    def libérer_relais(self, nom_relais: str) -> None:
+        if self.baux.lever(nom_relais):
+            self._publier()
+            self.logger.info(f"Forçage manuel {nom_relais} levé")
+
+    def _appliquer_relais(self, nom_relais: str, activer: bool) -> None:
+        """Commande automatique d'un relais, sauf s'il fait l'objet d'un forçage actif."""
+        with self._verrou:
+            bail = self.baux.actif(nom_relais)
+            self.contrôler_relais(nom_relais, bail.état if bail else activer)
+
+    def _lire_capteur_direct(self) -> DonnéesEnvironnement:
         try:
-            import requests
-            response = requests.get(
-                ESP32_CONFIG['url'],
-                timeout=int(ESP32_CONFIG['timeout'])
-            )
-            
-            if response.status_code != 200:
-                raise ErreurCapteur(f"Erreur HTTP: {response.status_code}")
-                
-            données = response.json()
-            
-            self._dernieres_donnees = DonnéesEnvironnement(
-                température=float(données['temperature']),
-                humidité=float(données['humidite']),
-                pression=float(données['pression']) * 10
+            données = DonnéesEnvironnement(**self.capteur.lire())
+            self._dernieres_donnees = données
+            # Lecture plus récente, relais tels que décidés au dernier cycle
+            self._publier(
+                température=données.température, humidité=données.humidité, pression=données.pression
             )
-            
-            return self._dernieres_donnees
+            return données
             
         except Exception as e:
             self.logger.error(f"Erreur lecture capteur: {str(e)}")
             raise ErreurCapteur(f"Échec lecture capteur: {str(e)}")
 
+    def lire_capteur(self, périmé_accepté: bool = False) -> Optional[DonnéesEnvironnement]:
+        """Lecture partagée: les appels simultanés ou rapprochés n'interrogent le capteur qu'une fois.
+
+        La boucle de contrôle n'accepte jamais de valeur périmée, afin qu'une panne
+        du capteur déclenche toujours le mode sécurité.
+        """
+        return self.cache_lecture.obtenir(self._lire_capteur_direct, périmé_accepté)
+
     def est_période_jour(self) -> bool:
         heure_actuelle = datetime.now().time()
         return dtime(
@@ -91,10 +231,13 @@ class ControleurSerre:
         if not self.en_mode_sécurité:
             self.logger.warning("ACTIVATION MODE SÉCURITÉ")
             try:
-                self.contrôler_relais('chauffage', True)
-                self.contrôler_relais('ventilation', False)
-                self.contrôler_relais('brumisation', False)
-                self.contrôler_relais('eclairage', not self.est_période_jour())
+                with self._verrou:
+                    self.contrôler_relais('chauffage', True)
+                    self.contrôler_relais('ventilation', False)
+                    self.contrôler_relais('brumisation', False)
+                    self.contrôler_relais('eclairage', not self.est_période_jour())
+                    self.en_mode_sécurité = True
+                    self._publier()
                 
                 notification = NotificationMessage(
                     "⚠️ ALERTE: Mode sécurité activé dans la serre",
@@ -102,8 +245,6 @@ class ControleurSerre:
                 )
                 self.pushover.envoyer_notification(notification)
                 
-                self.en_mode_sécurité = True
-                
             except Exception as e:
                 self.logger.critical(f"Erreur mode sécurité: {str(e)}")
 
@@ -120,14 +261,25 @@ class ControleurSerre:
                     priorité=0
                 )
                 self.pushover.envoyer_notification(notification)
-                self.en_mode_sécurité = False
 
+            self.statistiques.ajouter(données)
             self._gérer_alertes_température(données.température)
+            self._gérer_alertes_tendance(données.température)
 
-            self._gérer_chauffage(données)
-            self._gérer_ventilation(données)
-            self._gérer_brumisation(données)
-            self._gérer_eclairage()
+            prévue = self.prévision.prévoir(données.température)
+
+            # Décisions appliquées puis publiées d'un bloc: aucun lecteur ne voit un cycle à moitié appliqué
+            with self._verrou:
+                self.en_mode_sécurité = False
+                self._gérer_chauffage(données, prévue)
+                self._gérer_ventilation(données, prévue)
+                self._gérer_brumisation(données)
+                self._gérer_eclairage()
+                self._publier()
+            relais = self.états_relais()
+            self.prévision.ajouter(données.température, relais['chauffage'], relais['ventilation'])
+
+            self.historique.enregistrer(données, relais, self.en_mode_sécurité)
 
         except ErreurCapteur as e:
             self.logger.error(f"Erreur lecture capteur: {str(e)}")
@@ -137,22 +289,28 @@ class ControleurSerre:
             self.mode_sécurité()
 
     def _gérer_alertes_température(self, température: float) -> None:
+        # Chaque occurrence est comptée dans le résumé, qu'une alerte soit envoyée ou non
         if température < SEUILS_ENVIRONNEMENT['temp_critique_min']:
-            if not self.alerte_temp_basse and self.pushover.peut_envoyer_alerte('temp_basse'):
+            self.pushover.noter_alerte('temp_basse', température)
+            if not self.alerte_temp_basse and self.pushover.peut_envoyer_alerte('temp_basse', noter=False):
                 self.logger.debug("Envoi alerte température basse")
                 notification = NotificationMessage(
-                    f"🥶 ALERTE: Température critique basse: {température}°C",
+                    self._message_alerte(
+                        f"🥶 ALERTE: Température critique basse: {température}°C", 'temp_basse'
+                    ),
                     priorité=1
                 )
                 if self.pushover.envoyer_notification(notification):
                     self.alerte_temp_basse = True
                     
         elif température > SEUILS_ENVIRONNEMENT['temp_critique_max']:
-            if not self.alerte_temp_haute and self.pushover.peut_envoyer_alerte('temp_haute'):
+            self.pushover.noter_alerte('temp_haute', température)
+            if not self.alerte_temp_haute and self.pushover.peut_envoyer_alerte('temp_haute', noter=False):
                 self.logger.debug("Envoi alerte température haute")
-            # Gestion normale des équipements
                 notification = NotificationMessage(
-                    f"🔥 ALERTE: Température critique haute: {température}°C",
+                    self._message_alerte(
+                        f"🔥 ALERTE: Température critique haute: {température}°C", 'temp_haute'
+                    ),
                     priorité=1
                 )
                 if self.pushover.envoyer_notification(notification):
@@ -168,39 +326,80 @@ class ControleurSerre:
                     self.alerte_temp_basse = False
                     self.alerte_temp_haute = False
 
-    def _gérer_chauffage(self, données: DonnéesEnvironnement) -> None:
-        self.contrôler_relais('chauffage', données.température < SEUILS_ENVIRONNEMENT['temp_min'])
+    def _gérer_alertes_tendance(self, température: float) -> None:
+        variation = self.statistiques.température.variation_fenêtre()
+        if variation is None:
+            return
+        seuil = float(STATISTIQUES_CONFIG['seuil_variation_temp'])
+        durée = float(STATISTIQUES_CONFIG['fenetre_pente']) / 60
+        # Une alerte par épisode: réarmée quand la variation repasse sous le seuil
+        if variation > -seuil:
+            self.alerte_chute = False
+        if variation < seuil:
+            self.alerte_hausse = False
+        if variation <= -seuil and not self.alerte_chute:
+            if not self.pushover.peut_envoyer_alerte('temp_chute', température):
+                return
+            message = f"📉 ALERTE: Température en chute de {-variation:.1f}°C en {durée:.0f} min ({température}°C)"
+        elif variation >= seuil and not self.alerte_hausse:
+            if not self.pushover.peut_envoyer_alerte('temp_hausse', température):
+                return
+            message = f"📈 ALERTE: Température en hausse de {variation:.1f}°C en {durée:.0f} min ({température}°C)"
+        else:
+            return
+        self.logger.warning(message)
+        if self.pushover.envoyer_notification(NotificationMessage(message, priorité=1)):
+            if variation < 0:
+                self.alerte_chute = True
+            else:
+                self.alerte_hausse = True
+
+    def _message_alerte(self, message: str, type_alerte: str) -> str:
+        résumé = self.pushover.résumé_alerte(type_alerte, "°C")
+        return f"{message} ({résumé})" if résumé else message
+
+    def _gérer_chauffage(self, données: DonnéesEnvironnement, prévue: Optional[float] = None) -> None:
+        chauffage_nécessaire = données.température < SEUILS_ENVIRONNEMENT['temp_min']
+        if not chauffage_nécessaire and prévue is not None and prévue < SEUILS_ENVIRONNEMENT['temp_min']:
+            # Chauffage lent: mise en route avant le franchissement du seuil
+            self.logger.info(f"Chauffage anticipé: {prévue:.1f}°C prévus sans chauffage")
+            chauffage_nécessaire = True
+        self._appliquer_relais('chauffage', chauffage_nécessaire)
             
 
-    def _gérer_ventilation(self, données: DonnéesEnvironnement) -> None:
+    def _gérer_ventilation(self, données: DonnéesEnvironnement, prévue: Optional[float] = None) -> None:
         ventilation_nécessaire = (
             données.température > SEUILS_ENVIRONNEMENT['temp_max'] or
             (données.humidité > SEUILS_ENVIRONNEMENT['humid_max'] and
              SEUILS_ENVIRONNEMENT['temp_min'] < données.température < SEUILS_ENVIRONNEMENT['temp_max'])
         )
-        self.contrôler_relais('ventilation', ventilation_nécessaire)
+        if not ventilation_nécessaire and prévue is not None and prévue > SEUILS_ENVIRONNEMENT['temp_max']:
+            self.logger.info(f"Ventilation anticipée: {prévue:.1f}°C prévus sans ventilation")
+            ventilation_nécessaire = True
+        self._appliquer_relais('ventilation', ventilation_nécessaire)
 
     def _gérer_brumisation(self, données: DonnéesEnvironnement) -> None:
         brumisation_nécessaire = données.humidité < SEUILS_ENVIRONNEMENT['humid_normale']
-        self.contrôler_relais('brumisation', brumisation_nécessaire)
+        self._appliquer_relais('brumisation', brumisation_nécessaire)
 
     def _gérer_eclairage(self) -> None:
-        self.contrôler_relais('eclairage', self.est_période_jour())
+        self._appliquer_relais('eclairage', self.est_période_jour())
 
-    def obtenir_état(self) -> Dict[str, Any]:
+    def états_relais(self) -> Dict[str, bool]:
+        return {nom_relais: not self.gpio.input(pin) for nom_relais, pin in GPIO_CONFIG.items()}
+
+    def obtenir_état(self, frais: bool = False) -> Dict[str, Any]:
+        erreur = None
+        if frais:
+            try:
+                self.lire_capteur(périmé_accepté=True)
+            except ErreurCapteur as e:
+                erreur = str(e)
         try:
-            données = self._dernieres_donnees
             return {
-                "temperature": f"{données.température:.1f}" if données else "N/A",
-                "humidite": f"{données.humidité:.1f}" if données else "N/A",
-                "pression": f"{données.pression:.1f}" if données else "N/A",
-                "chauffage": not GPIO.input(GPIO_CONFIG['chauffage']),
-                "eclairage": not GPIO.input(GPIO_CONFIG['eclairage']),
-                "ventilation": not GPIO.input(GPIO_CONFIG['ventilation']),
-                "brumisation": not GPIO.input(GPIO_CONFIG['brumisation']),
+                **self._instantané.to_dict(),
                 "derniere_mise_a_jour": datetime.now().isoformat(),
-                "mode_securite": self.en_mode_sécurité,
-                "erreur": None
+                "erreur": erreur
             }
         except Exception as e:
             self.logger.error(f"Erreur obtention état: {str(e)}")
@@ -209,13 +408,34 @@ class ControleurSerre:
                 "derniere_mise_a_jour": datetime.now().isoformat()
             }
 
+    def énergie_relais(self) -> Dict[str, Any]:
+        return self.énergie.to_dict()
+
+    def métriques(self) -> str:
+        instantané = self._instantané
+        lignes = [
+            "# TYPE serre_mode_securite gauge",
+            f"serre_mode_securite {int(instantané.mode_sécurité)}",
+            "# TYPE serre_etat_version counter",
+            f"serre_etat_version {instantané.version}",
+        ]
+        if instantané.température is not None:
+            lignes += [
+                "# TYPE serre_temperature_celsius gauge",
+                f"serre_temperature_celsius {instantané.température:g}",
+                "# TYPE serre_humidite_pourcent gauge",
+                f"serre_humidite_pourcent {instantané.humidité:g}",
+            ]
+        return "\n".join(lignes) + "\n" + self.énergie.métriques()
+
     def nettoyer(self) -> None:
         """Nettoyage des ressources."""
         self.logger.info("Nettoyage du système")
         try:
             for nom_relais in GPIO_CONFIG:
                 self.contrôler_relais(nom_relais, False)
-            GPIO.cleanup()
+            self.gpio.cleanup()
+            self.énergie.sauvegarder()
             self.logger.info("Nettoyage terminé avec succès")
         except Exception as e:
             self.logger.error(f"Erreur pendant le nettoyage: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,30 @@
+import asyncio
+import threading
+from services.logging_service import ServiceLogging
+from services.flotte_service import AgrégateurFlotte
+from services.memoire_service import ServiceMémoire
+from controllers.flotte_controller import ControleurFlotte
+
+
+def main():
+    logger = ServiceLogging("serre.flotte").get_logger
+    agrégateur = AgrégateurFlotte()
+    mémoire = ServiceMémoire()
+    mémoire.enregistrer_réductible("flotte", agrégateur)
+    mémoire.démarrer_surveillance()
+    thread = threading.Thread(
+        target=asyncio.run,
+        args=(agrégateur.exécuter(),),
+        name="agregation",
+        daemon=True
+    )
+    thread.start()
+    logger.info("Démarrage de l'API de la flotte")
+    try:
+        ControleurFlotte(agrégateur).démarrer()
+    except KeyboardInterrupt:
+        print("\nArrêt demandé par l'utilisateur")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,12 @@ from typing import Optional
 from services.logging_service import ServiceLogging
 from controllers.serre_controller import ControleurSerre
 from controllers.api_controller import ControleurAPI
-from models.exceptions import CapteurError
+from models.exceptions import ErreurCapteur
 from services.pushover_service import NotificationMessage
+from services.etat_partage_service import ÉtatPartagé, ProcessusAPI, RécepteurCommandes
+from services.systemd_service import SurveillanceÉchéance
+from services.memoire_service import ServiceMémoire
+from config import API_CONFIG
 
 class Application:
 
@@ -16,23 +20,48 @@ class Application:
         self.logger.info("Démarrage de l'application")
         
         self.serre_controller = ControleurSerre()
-        self.api_controller = ControleurAPI(self.serre_controller)
+        self.mémoire = ServiceMémoire()
+        self.mémoire.enregistrer_réductible("limitation", self.serre_controller.pushover.limiteur)
+        self.mémoire.enregistrer_réductible("prevision", self.serre_controller.prévision)
+        for nom, backend in (("gpio", self.serre_controller.gpio), ("capteur", self.serre_controller.capteur)):
+            if hasattr(backend, "réduire"):
+                self.mémoire.enregistrer_réductible(nom, backend)
+        self.api_séparée = API_CONFIG['processus_separe'].lower() == "true"
+        self.état_partagé: Optional[ÉtatPartagé] = None
+        self.processus_api: Optional[ProcessusAPI] = None
+        self.récepteur_commandes: Optional[RécepteurCommandes] = None
+        if self.api_séparée:
+            self.état_partagé = ÉtatPartagé()
+            self.processus_api = ProcessusAPI(self.état_partagé)
+            self.récepteur_commandes = RécepteurCommandes(self.processus_api.commandes, {
+                "forcer_relais": self._commande(self.serre_controller.forcer_relais),
+                "libérer_relais": self._commande(self.serre_controller.libérer_relais),
+                "actualiser": lambda: self.publier_état(frais=True),
+            })
+        else:
+            self.api_controller = ControleurAPI(self.serre_controller, mémoire=self.mémoire)
         
+        point = self.serre_controller.point_restauré
         notification = NotificationMessage(
-            "🌱 Système de gestion de la serre démarré",
+            "🔄 Système de gestion de la serre redémarré (état restauré)" if point
+            else "🌱 Système de gestion de la serre démarré",
             priorité=0
         )
         self.serre_controller.pushover.envoyer_notification(notification)
         
-        self.echecs_consecutifs = 0
+        self.echecs_consecutifs = int(point.get("echecs_consecutifs", 0)) if point else 0
         self.SEUIL_ECHECS = 3
+        self.surveillance = SurveillanceÉchéance()
+        self._verrou_publication = threading.Lock()
         
         self.thread_controle: Optional[threading.Thread] = None
 
     def boucle_controle(self) -> None:
         self.logger.info("Démarrage de la boucle de contrôle")
         
-        while not self.serre_controller.systemd.stopping:
+        systemd = self.serre_controller.systemd
+        while not systemd.arret_en_cours:
+            self.surveillance.début_cycle()
             try:
                 données = self.serre_controller.lire_capteur()
                 
@@ -65,7 +94,7 @@ class Application:
                         self.serre_controller.pushover.envoyer_notification(notification)
                         self.serre_controller.mode_sécurité()
                         
-            except CapteurError as e:
+            except ErreurCapteur as e:
                 self.echecs_consecutifs += 1
                 self.logger.error(
                     f"Erreur lecture capteur (échec {self.echecs_consecutifs}/"
@@ -90,10 +119,56 @@ class Application:
                 self.serre_controller.mode_sécurité()
                 
             finally:
-                time.sleep(60)
+                if self.processus_api is not None:
+                    self._surveiller_api()
+                # À chaque cycle, y compris en mode sécurité où le chauffage reste allumé
+                self.serre_controller.énergie.sauvegarder()
+                self.serre_controller.enregistrer_reprise(echecs_consecutifs=self.echecs_consecutifs)
+                self.publier_état()
+                self.surveillance.fin_cycle()
+                if self.surveillance.cycles == 1:
+                    systemd.notifier("READY=1", f"STATUS={self.surveillance.statut()}")
+                time.sleep(self.surveillance.période)
+
+    def _surveiller_api(self) -> None:
+        try:
+            if self.processus_api.surveiller() and self.serre_controller.pushover.peut_envoyer_alerte('api_relancee'):
+                notification = NotificationMessage(
+                    f"⚠️ API web arrêtée puis relancée ({self.processus_api.redémarrages} relance(s))",
+                    priorité=1
+                )
+                self.serre_controller.pushover.envoyer_notification(notification)
+        except Exception as e:
+            self.logger.error(f"Erreur relance processus API: {str(e)}")
+
+    def publier_état(self, frais: bool = False) -> None:
+        if self.état_partagé is not None:
+            with self._verrou_publication:
+                self.état_partagé.publier(self.serre_controller.obtenir_état(frais=frais))
+
+    def _commande(self, action):
+        """Exécute une commande reçue de l'API puis republie l'état immédiatement."""
+        def exécuter(**arguments) -> None:
+            action(**arguments)
+            self.publier_état()
+        return exécuter
 
     def démarrer(self) -> None:
         try:
+            self.mémoire.démarrer_surveillance()
+            self.serre_controller.systemd.démarrer_watchdog(
+                self.surveillance,
+                en_retard=self.serre_controller.mode_sécurité
+            )
+
+            if self.api_séparée:
+                self.publier_état()
+                self.logger.info("Démarrage de l'API dans un processus séparé")
+                self.processus_api.démarrer()
+                self.récepteur_commandes.démarrer()
+                self.boucle_controle()
+                return
+
             self.thread_controle = threading.Thread(
                 target=self.boucle_controle,
                 daemon=True
@@ -123,6 +198,11 @@ class Application:
         
         if self.thread_controle and self.thread_controle.is_alive():
             self.thread_controle.join(timeout=5)
+
+        if self.processus_api:
+            self.récepteur_commandes.arrêter()
+            self.processus_api.arrêter()
+            self.état_partagé.fermer()
             
         self.serre_controller.nettoyer()
 
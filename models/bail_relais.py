@@ -0,0 +1,80 @@
+import time
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from .exceptions import ErreurValidation
+
+
+@dataclass(frozen=True)
+class BailRelais:
+    état: bool
+    expiration: float
+
+    def actif(self, maintenant: float) -> bool:
+        return maintenant < self.expiration
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'etat': self.état,
+            'expiration': datetime.fromtimestamp(self.expiration).isoformat()
+        }
+
+
+def valider_durée(durée: float, durée_max: float) -> None:
+    if not 0 < durée <= durée_max:
+        raise ErreurValidation(
+            f"Durée de forçage {durée}s hors limites ]0s, {durée_max:.0f}s]"
+        )
+
+
+class RegistreBaux:
+    """Forçages manuels des relais, valables jusqu'à leur expiration."""
+
+    def __init__(self, durée_max: float):
+        self.durée_max = durée_max
+        self._baux: Dict[str, BailRelais] = {}
+        self._verrou = threading.Lock()
+
+    def poser(self, nom_relais: str, état: bool, durée: float,
+              maintenant: Optional[float] = None) -> BailRelais:
+        valider_durée(durée, self.durée_max)
+        maintenant = time.time() if maintenant is None else maintenant
+        bail = BailRelais(état, maintenant + durée)
+        with self._verrou:
+            self._baux[nom_relais] = bail
+        return bail
+
+    def lever(self, nom_relais: str) -> Optional[BailRelais]:
+        with self._verrou:
+            return self._baux.pop(nom_relais, None)
+
+    def actif(self, nom_relais: str, maintenant: Optional[float] = None) -> Optional[BailRelais]:
+        maintenant = time.time() if maintenant is None else maintenant
+        with self._verrou:
+            bail = self._baux.get(nom_relais)
+            if bail is not None and not bail.actif(maintenant):
+                del self._baux[nom_relais]
+                return None
+            return bail
+
+    def exporter(self) -> Dict[str, List]:
+        with self._verrou:
+            return {nom: [bail.état, bail.expiration] for nom, bail in self._baux.items()}
+
+    def importer(self, données: Dict[str, List], maintenant: Optional[float] = None) -> None:
+        maintenant = time.time() if maintenant is None else maintenant
+        with self._verrou:
+            for nom, (état, expiration) in données.items():
+                bail = BailRelais(bool(état), float(expiration))
+                if bail.actif(maintenant):
+                    self._baux[nom] = bail
+
+    def to_dict(self, maintenant: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        maintenant = time.time() if maintenant is None else maintenant
+        with self._verrou:
+            return {
+                nom: bail.to_dict()
+                for nom, bail in self._baux.items()
+                if bail.actif(maintenant)
+            }
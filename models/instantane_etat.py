@@ -0,0 +1,56 @@
+from dataclasses import dataclass, fields
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+
+def figer(valeur: Any) -> Any:
+    """Copie en lecture seule: dictionnaires en MappingProxyType, listes en tuples."""
+    if isinstance(valeur, Mapping):
+        return MappingProxyType({clé: figer(v) for clé, v in valeur.items()})
+    if isinstance(valeur, (list, tuple)):
+        return tuple(figer(v) for v in valeur)
+    return valeur
+
+
+def dégeler(valeur: Any) -> Any:
+    if isinstance(valeur, Mapping):
+        return {clé: dégeler(v) for clé, v in valeur.items()}
+    if isinstance(valeur, tuple):
+        return [dégeler(v) for v in valeur]
+    return valeur
+
+
+@dataclass(frozen=True)
+class InstantanéÉtat:
+    """État cohérent de la serre, publié par simple remplacement de référence.
+
+    Jamais modifié après sa création: les lecteurs n'ont besoin d'aucun verrou.
+    """
+    version: int
+    génération: str
+    température: Optional[float]
+    humidité: Optional[float]
+    pression: Optional[float]
+    relais: Mapping[str, bool]
+    mode_sécurité: bool
+    statistiques: Mapping[str, Any]
+    baux: Mapping[str, Any]
+
+    def même_contenu(self, autre: "InstantanéÉtat") -> bool:
+        return all(
+            getattr(self, champ.name) == getattr(autre, champ.name)
+            for champ in fields(self) if champ.name != "version"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "temperature": f"{self.température:.1f}" if self.température is not None else "N/A",
+            "humidite": f"{self.humidité:.1f}" if self.humidité is not None else "N/A",
+            "pression": f"{self.pression:.1f}" if self.pression is not None else "N/A",
+            **self.relais,
+            "mode_securite": self.mode_sécurité,
+            "statistiques": dégeler(self.statistiques),
+            "baux": dégeler(self.baux),
+            "version": self.version,
+            "generation": self.génération,
+        }
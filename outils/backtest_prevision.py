@@ -0,0 +1,129 @@
+"""Évaluation a posteriori de la prévision de température sur l'historique enregistré.
+
+Rejoue l'historique en « walk-forward »: le modèle est réajusté toutes les
+`periode_ajustement` secondes sur la fenêtre qui précède, puis évalué sur les
+lectures suivantes, jamais vues à l'apprentissage. Compare l'erreur à celle de
+la persistance (T(t + horizon) = T(t)). La prévision est conditionnée par le
+fonctionnement effectif du chauffage et de la ventilation pendant l'horizon,
+comme en exploitation où le contrôleur connaît la commande qu'il applique.
+
+Le gain sur le temps hors consigne est une estimation: on suppose qu'un
+actionneur démarré au moment où la prévision « libre » annonce le franchissement
+maintient la serre dans la consigne pendant l'avance obtenue. C'est une borne
+optimiste, à confirmer en exploitation.
+
+Usage: python -m outils.backtest_prevision --debut 2024-01-01 --fin 2024-03-01
+"""
+import argparse
+import sys
+import time
+from services.historique_service import HistoriqueSerre, analyser_intervalle
+from services.prevision_service import (
+    ServicePrévision, construire_jeu, caractéristiques, BIT_CHAUFFAGE, BIT_VENTILATION, np
+)
+from models.exceptions import ExceptionSerre
+from config import SEUILS_ENVIRONNEMENT
+
+
+def _charger(historique: HistoriqueSerre, début: float, fin: float):
+    enregistrements = [e for bloc in historique.lire(début, fin) for e in bloc]
+    if not enregistrements:
+        return None
+    brut = np.array([(e[0], e[1], e[4]) for e in enregistrements], dtype=float)
+    bits = brut[:, 2].astype(np.int64)
+    return (
+        brut[:, 0], brut[:, 1],
+        ((bits & BIT_CHAUFFAGE) != 0).astype(float), ((bits & BIT_VENTILATION) != 0).astype(float)
+    )
+
+
+def _excursions(t, température, prévue_libre, horizon: float):
+    """Temps hors consigne observé et part estimée évitable par anticipation."""
+    t_min, t_max = SEUILS_ENVIRONNEMENT['temp_min'], SEUILS_ENVIRONNEMENT['temp_max']
+    côté = np.where(température < t_min, -1, np.where(température > t_max, 1, 0))
+    alerte = np.where(prévue_libre < t_min, -1, np.where(prévue_libre > t_max, 1, 0))
+    durées = np.diff(t, append=t[-1])
+    hors_consigne = float(durées[côté != 0].sum())
+
+    évitable = 0.0
+    débuts = np.flatnonzero((côté[1:] != 0) & (côté[:-1] != côté[1:])) + 1
+    for i in débuts:
+        fin = i
+        while fin < len(côté) and côté[fin] == côté[i]:
+            fin += 1
+        # Première alerte du même côté, émise depuis la consigne dans l'horizon précédent
+        fenêtre = np.flatnonzero(
+            (t >= t[i] - horizon) & (t < t[i]) & (côté == 0) & (alerte == côté[i])
+        )
+        if len(fenêtre):
+            avance = t[i] - t[fenêtre[0]]
+            évitable += min(avance, float(durées[i:fin].sum()))
+    return hors_consigne, évitable
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Évaluation de la prévision de température")
+    parser.add_argument("--debut", help="Date de début ISO 8601 (défaut: fin - 24 h)")
+    parser.add_argument("--fin", help="Date de fin ISO 8601 (défaut: maintenant)")
+    args = parser.parse_args()
+
+    if np is None:
+        print("Erreur: NumPy est nécessaire à la prévision", file=sys.stderr)
+        return 1
+    try:
+        début, fin = analyser_intervalle(args.debut, args.fin)
+    except ExceptionSerre as e:
+        print(f"Erreur: {str(e)}", file=sys.stderr)
+        return 1
+
+    paramètres = ServicePrévision()
+    série = _charger(HistoriqueSerre(), début - paramètres.fenêtre, fin)
+    if série is None:
+        print("Aucun enregistrement sur la période", file=sys.stderr)
+        return 1
+    t, température, chauffage, ventilation = série
+    X, y, t_X = construire_jeu(
+        t, température, chauffage, ventilation, paramètres.horizon, paramètres.retard, paramètres.tolérance
+    )
+
+    erreurs, persistance, durées_ajustement = [], [], []
+    libres = np.full(len(t), np.nan)
+    tendance = température - température[np.minimum(np.searchsorted(t, t - paramètres.retard), len(t) - 1)]
+    X_libre = caractéristiques(t, température, tendance, np.zeros(len(t)), np.zeros(len(t)))
+    for instant in np.arange(début, fin, paramètres.période_ajustement):
+        apprentissage = (t_X >= instant - paramètres.fenêtre) & (t_X < instant - paramètres.horizon)
+        if apprentissage.sum() < paramètres.échantillons_min:
+            continue
+        chrono = time.perf_counter()
+        coefficients = np.linalg.lstsq(X[apprentissage], y[apprentissage], rcond=None)[0]
+        durées_ajustement.append(time.perf_counter() - chrono)
+        test = (t_X >= instant) & (t_X < instant + paramètres.période_ajustement)
+        erreurs.append(X[test] @ coefficients - y[test])
+        persistance.append(-y[test])
+        lectures = (t >= instant) & (t < instant + paramètres.période_ajustement)
+        libres[lectures] = température[lectures] + X_libre[lectures] @ coefficients
+
+    if not erreurs:
+        print("Historique insuffisant pour ajuster le modèle", file=sys.stderr)
+        return 1
+    erreurs, persistance = np.concatenate(erreurs), np.concatenate(persistance)
+    évaluées = (t >= début) & ~np.isnan(libres)
+    hors_consigne, évitable = _excursions(
+        t[évaluées], température[évaluées], libres[évaluées], paramètres.horizon
+    )
+
+    print(f"{len(erreurs)} prévisions à {paramètres.horizon / 60:.0f} min, "
+          f"{len(durées_ajustement)} ajustements")
+    for libellé, e in (("modèle", erreurs), ("persistance", persistance)):
+        print(f"{libellé:<12} MAE {np.mean(np.abs(e)):.2f}°C  RMSE {np.sqrt(np.mean(e ** 2)):.2f}°C")
+    print(f"Ajustement: médiane {np.median(durées_ajustement) * 1000:.1f} ms, "
+          f"max {max(durées_ajustement) * 1000:.1f} ms")
+    print(f"Hors consigne observé: {hors_consigne / 3600:.1f} h")
+    if hors_consigne:
+        print(f"Évitable par anticipation (estimation): {évitable / 3600:.1f} h "
+              f"({évitable / hors_consigne:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
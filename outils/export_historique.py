@@ -0,0 +1,38 @@
+"""Export de l'historique de la serre en CSV gzip ou en flux Arrow IPC.
+
+Usage: python -m outils.export_historique --debut 2024-01-01 --fin 2024-12-31 \
+           --format csv --sortie serre.csv.gz
+"""
+import argparse
+import sys
+from services.historique_service import HistoriqueSerre, analyser_intervalle
+from models.exceptions import ExceptionSerre
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export de l'historique de la serre")
+    parser.add_argument("--debut", help="Date de début ISO 8601 (défaut: fin - 24 h)")
+    parser.add_argument("--fin", help="Date de fin ISO 8601 (défaut: maintenant)")
+    parser.add_argument("--format", choices=("csv", "arrow"), default="csv")
+    parser.add_argument("--sortie", required=True, help="Fichier de sortie ('-' pour stdout)")
+    args = parser.parse_args()
+
+    try:
+        début, fin = analyser_intervalle(args.debut, args.fin)
+        historique = HistoriqueSerre()
+        if args.format == "csv":
+            flux = historique.exporter_csv_gzip(début, fin)
+        else:
+            flux = historique.exporter_arrow(début, fin)
+        sortie = sys.stdout.buffer if args.sortie == "-" else open(args.sortie, "wb")
+        with sortie:
+            for morceau in flux:
+                sortie.write(morceau)
+    except ExceptionSerre as e:
+        print(f"Erreur: {str(e)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
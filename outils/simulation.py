@@ -0,0 +1,100 @@
+"""Simulation de milliers de serres virtuelles dans un seul processus.
+
+Chaque serre utilise les backends factices (GPIO en mémoire, capteur
+synthétique) et une horloge simulée qui avance d'un cycle de contrôle par tour.
+Les notifications passent par la limitation réelle mais ne sont pas envoyées.
+
+Usage: python -m outils.simulation --serres 2000 --cycles 60
+"""
+import argparse
+import logging
+import resource
+import time
+from types import SimpleNamespace
+from typing import List
+from controllers.serre_controller import ControleurSerre
+from services.limitation_service import LimiteurAlertes
+from services.materiel_service import GPIOFactice, CapteurFactice
+from services.cache_service import CacheLectureUnique
+from services.energie_service import ServiceÉnergie
+from services.reprise_service import PointDeReprise
+from services.prevision_service import ServicePrévision
+from services.pushover_service import ServicePushover, NotificationMessage
+from config import WATCHDOG_CONFIG, PUSHOVER_CONFIG, ESP32_CONFIG
+
+
+class PushoverSimulé(ServicePushover):
+    def __init__(self):
+        super().__init__(LimiteurAlertes(int(PUSHOVER_CONFIG['delai_min_alerte'])))
+        self.envoyées = 0
+
+    def envoyer_notification(self, notification: NotificationMessage, retry: int = 3) -> bool:
+        self.envoyées += 1
+        return True
+
+
+class HistoriqueNul:
+    def enregistrer(self, *args, **kwargs) -> None:
+        pass
+
+    def lire(self, début: float, fin: float):
+        return iter(())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulation de serres virtuelles")
+    parser.add_argument("--serres", type=int, default=1000)
+    parser.add_argument("--cycles", type=int, default=60)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("serre").setLevel(logging.ERROR)
+
+    période = float(WATCHDOG_CONFIG['periode_boucle'])
+    horloge = SimpleNamespace(t=time.time())
+    systemd = SimpleNamespace(arret_en_cours=False)
+    historique = HistoriqueNul()
+
+    début = time.perf_counter()
+    serres: List[ControleurSerre] = [
+        ControleurSerre(
+            gpio=GPIOFactice(),
+            capteur=CapteurFactice(
+                graine=i, horloge=lambda: horloge.t,
+                température_moyenne=14.0 + (i % 12), dérive=-0.5 if i % 50 == 0 else 0.0
+            ),
+            pushover=PushoverSimulé(),
+            systemd=systemd,
+            historique=historique,
+            cache_lecture=CacheLectureUnique(
+                float(ESP32_CONFIG['ttl_lecture']), 0.0, 0.0, horloge=lambda: horloge.t
+            ),
+            énergie=ServiceÉnergie(horloge=lambda: horloge.t),
+            reprise=PointDeReprise(),
+            prévision=ServicePrévision(horloge=lambda: horloge.t)
+        )
+        for i in range(args.serres)
+    ]
+    création = time.perf_counter() - début
+
+    durées = []
+    for _ in range(args.cycles):
+        horloge.t += période
+        début = time.perf_counter()
+        for serre in serres:
+            serre.gérer_environnement(serre.lire_capteur())
+            serre.obtenir_état()
+        durées.append(time.perf_counter() - début)
+
+    notifications = sum(serre.pushover.envoyées for serre in serres)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    durées.sort()
+    print(f"{args.serres} serres créées en {création:.2f} s, RSS max {rss:.0f} Mo")
+    print(
+        f"{args.cycles} cycles: médiane {durées[len(durées) // 2] * 1000:.1f} ms/cycle, "
+        f"{durées[len(durées) // 2] / args.serres * 1e6:.1f} µs/serre, max {durées[-1] * 1000:.1f} ms"
+    )
+    print(f"{notifications} notifications générées")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import threading
+import time
+import logging
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Vol(Generic[T]):
+    __slots__ = ("terminé", "résultat", "erreur")
+
+    def __init__(self):
+        self.terminé = threading.Event()
+        self.résultat: Optional[T] = None
+        self.erreur: Optional[BaseException] = None
+
+
+class CacheLectureUnique(Generic[T]):
+    """Cache à durée de vie avec appel unique (single-flight).
+
+    Tous les appelants concurrents partagent le même chargement en cours. Si le
+    chargement tarde et qu'une valeur périmée de moins de `péremption` secondes
+    existe, elle est renvoyée pendant que le chargement se poursuit
+    (stale-while-revalidate).
+    """
+
+    def __init__(self, ttl: float, péremption: float, délai_lent: float,
+                 horloge: Callable[[], float] = time.monotonic):
+        self.logger = logging.getLogger("serre.cache")
+        self.ttl = ttl
+        self.péremption = péremption
+        self.délai_lent = délai_lent
+        self.horloge = horloge
+        self._valeur: Optional[T] = None
+        self._horodatage = float("-inf")
+        self._en_cours: Optional[_Vol[T]] = None
+        self._verrou = threading.Lock()
+        self.chargements = 0
+
+    def âge(self) -> float:
+        return self.horloge() - self._horodatage
+
+    def _charger(self, vol: _Vol[T], charger: Callable[[], T]) -> None:
+        try:
+            vol.résultat = charger()
+            with self._verrou:
+                self._valeur = vol.résultat
+                self._horodatage = self.horloge()
+        except BaseException as e:
+            vol.erreur = e
+        finally:
+            with self._verrou:
+                self._en_cours = None
+            vol.terminé.set()
+
+    def obtenir(self, charger: Callable[[], T], périmé_accepté: bool = False) -> T:
+        with self._verrou:
+            âge = self.âge()
+            if self._valeur is not None and âge <= self.ttl:
+                return self._valeur
+            vol = self._en_cours
+            meneur = vol is None
+            if meneur:
+                vol = self._en_cours = _Vol()
+                self.chargements += 1
+            périmée = self._valeur if âge <= self.ttl + self.péremption else None
+
+        if périmé_accepté and périmée is not None:
+            if meneur:
+                threading.Thread(target=self._charger, args=(vol, charger), daemon=True).start()
+            if not vol.terminé.wait(self.délai_lent):
+                self.logger.debug(f"Lecture lente, valeur périmée de {âge:.1f}s renvoyée")
+                return périmée
+        elif meneur:
+            self._charger(vol, charger)
+        else:
+            vol.terminé.wait()
+
+        if vol.erreur is not None:
+            raise vol.erreur
+        return vol.résultat
@@ -0,0 +1,227 @@
+import struct
+import threading
+import time
+import logging
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from services.fichiers_service import écrire_atomiquement
+from config import ENERGIE_CONFIG, GPIO_CONFIG
+
+# Fichier: [magique][version][nb relais][nb heures][nb jours][horodatage de sauvegarde]
+# puis, par relais: nom, état, début de l'état, cumul, commutations, dernières
+# périodes écrites, et les deux séries de secondes actives (float64)
+ENTÊTE = struct.Struct("<4sBHHHd")
+COMPTEUR = struct.Struct("<16s?ddIqq")
+MAGIQUE = b"NRJ1"
+
+
+class SérieCyclique:
+    """Secondes actives par période (heure, jour) sur un tampon circulaire."""
+
+    __slots__ = ("période", "décalage", "valeurs", "dernière")
+
+    def __init__(self, taille: int, période: float, décalage: float = 0.0):
+        self.période = période
+        self.décalage = décalage
+        self.valeurs = array("d", bytes(8 * taille))
+        self.dernière = 0
+
+    def indice(self, t: float) -> int:
+        return int((t + self.décalage) // self.période)
+
+    def _avancer(self, indice: int) -> None:
+        if indice <= self.dernière:
+            return
+        taille = len(self.valeurs)
+        for k in range(max(self.dernière + 1, indice - taille + 1), indice + 1):
+            self.valeurs[k % taille] = 0.0
+        self.dernière = indice
+
+    def ajouter(self, début: float, fin: float) -> None:
+        """Répartit l'intervalle [début, fin[ sur les périodes qu'il couvre."""
+        while début < fin:
+            indice = self.indice(début)
+            borne = min(fin, (indice + 1) * self.période - self.décalage)
+            self._avancer(indice)
+            if indice > self.dernière - len(self.valeurs):
+                self.valeurs[indice % len(self.valeurs)] += borne - début
+            début = borne
+
+    def rapports(self, maintenant: float) -> List[float]:
+        """Rapports cycliques, de la plus ancienne période à la période en cours."""
+        self._avancer(self.indice(maintenant))
+        taille = len(self.valeurs)
+        en_cours = (maintenant + self.décalage) % self.période or self.période
+        return [
+            round(self.valeurs[k % taille] / (self.période if k != self.dernière else en_cours), 4)
+            for k in range(self.dernière - taille + 1, self.dernière + 1)
+        ]
+
+
+class CompteurRelais:
+    __slots__ = ("actif", "depuis", "cumul", "commutations", "heures", "jours")
+
+    def __init__(self, heures: int, jours: int, décalage: float, maintenant: float):
+        self.actif = False
+        self.depuis = maintenant
+        self.cumul = 0.0
+        self.commutations = 0
+        self.heures = SérieCyclique(heures, 3600, décalage)
+        self.jours = SérieCyclique(jours, 86400, décalage)
+
+    def cumuler(self, maintenant: float) -> None:
+        if self.actif and maintenant > self.depuis:
+            self.cumul += maintenant - self.depuis
+            self.heures.ajouter(self.depuis, maintenant)
+            self.jours.ajouter(self.depuis, maintenant)
+        self.depuis = max(self.depuis, maintenant)
+
+
+class ServiceÉnergie:
+    """Temps de fonctionnement, commutations et énergie consommée par relais."""
+
+    def __init__(self, fichier: Optional[Path] = None, relais: Optional[Iterable[str]] = None,
+                 horloge: Callable[[], float] = time.time):
+        self.logger = logging.getLogger("serre.energie")
+        self.fichier = fichier
+        self.horloge = horloge
+        self.heures = int(ENERGIE_CONFIG['heures'])
+        self.jours = int(ENERGIE_CONFIG['jours'])
+        # Périodes alignées sur l'heure locale (décalage figé au démarrage)
+        self.décalage = float(time.localtime().tm_gmtoff)
+        self.puissances = {
+            nom: float(ENERGIE_CONFIG.get(f'puissance_{nom}', "0")) for nom in relais or GPIO_CONFIG
+        }
+        maintenant = self.horloge()
+        self.compteurs: Dict[str, CompteurRelais] = {
+            nom: CompteurRelais(self.heures, self.jours, self.décalage, maintenant) for nom in self.puissances
+        }
+        self._verrou = threading.Lock()
+        self._charger()
+
+    def commuter(self, nom_relais: str, activer: bool) -> None:
+        """Enregistre l'état commandé d'un relais (O(1) hors changement de période)."""
+        compteur = self.compteurs.get(nom_relais)
+        if compteur is None:
+            return
+        with self._verrou:
+            compteur.cumuler(self.horloge())
+            if activer != compteur.actif:
+                compteur.actif = activer
+                compteur.commutations += 1
+
+    def reprendre(self, nom_relais: str, activer: bool) -> None:
+        """Fixe l'état d'un relais au démarrage.
+
+        Un relais actif à la sauvegarde et toujours actif (redémarrage à chaud)
+        est compté pendant l'interruption; sinon le cumul s'arrête à la sauvegarde.
+        Un état différent de l'état sauvegardé compte une commutation, comme
+        l'extinction à l'arrêt: un redémarrage compte ses deux commutations.
+        """
+        compteur = self.compteurs.get(nom_relais)
+        if compteur is None:
+            return
+        with self._verrou:
+            maintenant = self.horloge()
+            if compteur.actif and activer:
+                compteur.cumuler(maintenant)
+            else:
+                compteur.depuis = max(compteur.depuis, maintenant)
+            if activer != compteur.actif:
+                compteur.actif = activer
+                compteur.commutations += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        maintenant = self.horloge()
+        relais: Dict[str, Any] = {}
+        with self._verrou:
+            for nom, compteur in self.compteurs.items():
+                compteur.cumuler(maintenant)
+                relais[nom] = {
+                    "actif": compteur.actif,
+                    "duree_h": round(compteur.cumul / 3600, 3),
+                    "commutations": compteur.commutations,
+                    "puissance_w": self.puissances[nom],
+                    "energie_kwh": round(compteur.cumul / 3600 * self.puissances[nom] / 1000, 3),
+                    "rapport_cyclique_heures": compteur.heures.rapports(maintenant),
+                    "rapport_cyclique_jours": compteur.jours.rapports(maintenant),
+                }
+        return {
+            "relais": relais,
+            "energie_totale_kwh": round(sum(r["energie_kwh"] for r in relais.values()), 3),
+        }
+
+    def métriques(self) -> str:
+        """Compteurs au format d'exposition texte Prometheus."""
+        relais = self.to_dict()["relais"]
+        lignes = []
+        for nom_métrique, clé, type_métrique, facteur in (
+            ("serre_relais_actif", "actif", "gauge", 1),
+            ("serre_relais_secondes_total", "duree_h", "counter", 3600),
+            ("serre_relais_commutations_total", "commutations", "counter", 1),
+            ("serre_relais_energie_kwh_total", "energie_kwh", "counter", 1),
+        ):
+            lignes.append(f"# TYPE {nom_métrique} {type_métrique}")
+            lignes += [
+                f'{nom_métrique}{{relais="{nom}"}} {float(valeurs[clé]) * facteur:g}'
+                for nom, valeurs in relais.items()
+            ]
+        lignes.append("# TYPE serre_relais_rapport_cyclique_heure gauge")
+        lignes += [
+            f'serre_relais_rapport_cyclique_heure{{relais="{nom}"}} {valeurs["rapport_cyclique_heures"][-1]:g}'
+            for nom, valeurs in relais.items()
+        ]
+        return "\n".join(lignes) + "\n"
+
+    def sauvegarder(self) -> None:
+        if self.fichier is None:
+            return
+        maintenant = self.horloge()
+        with self._verrou:
+            morceaux = [ENTÊTE.pack(MAGIQUE, 1, len(self.compteurs), self.heures, self.jours, maintenant)]
+            for nom, compteur in self.compteurs.items():
+                compteur.cumuler(maintenant)
+                morceaux.append(COMPTEUR.pack(
+                    nom.encode("utf-8"), compteur.actif, compteur.depuis, compteur.cumul,
+                    compteur.commutations, compteur.heures.dernière, compteur.jours.dernière
+                ))
+                morceaux.append(compteur.heures.valeurs.tobytes())
+                morceaux.append(compteur.jours.valeurs.tobytes())
+        try:
+            écrire_atomiquement(self.fichier, b"".join(morceaux))
+        except Exception as e:
+            self.logger.error(f"Erreur sauvegarde compteurs énergie: {str(e)}")
+
+    def _charger(self) -> None:
+        """Restaure les compteurs, avec l'état et le début de l'état de chaque relais."""
+        if self.fichier is None or not self.fichier.exists():
+            return
+        try:
+            contenu = self.fichier.read_bytes()
+            magique, _, nombre, heures, jours, _ = ENTÊTE.unpack_from(contenu, 0)
+            if magique != MAGIQUE or (heures, jours) != (self.heures, self.jours):
+                self.logger.warning("Format des compteurs énergie modifié, remise à zéro")
+                return
+            position = ENTÊTE.size
+            for _ in range(nombre):
+                nom, actif, depuis, cumul, commutations, dernière_h, dernière_j = (
+                    COMPTEUR.unpack_from(contenu, position)
+                )
+                position += COMPTEUR.size
+                séries = []
+                for taille in (heures, jours):
+                    séries.append(array("d", contenu[position:position + 8 * taille]))
+                    position += 8 * taille
+                compteur = self.compteurs.get(nom.rstrip(b"\0").decode("utf-8"))
+                if compteur is None:
+                    continue
+                compteur.actif = actif
+                compteur.depuis = depuis
+                compteur.cumul = cumul
+                compteur.commutations = commutations
+                compteur.heures.valeurs, compteur.jours.valeurs = séries
+                compteur.heures.dernière, compteur.jours.dernière = dernière_h, dernière_j
+            self.logger.info(f"Compteurs énergie restaurés ({nombre} relais)")
+        except Exception as e:
+            self.logger.error(f"Erreur lecture compteurs énergie: {str(e)}")
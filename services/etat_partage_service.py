@@ -0,0 +1,235 @@
+import json
+import struct
+import threading
+import time
+import logging
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Optional
+from models.exceptions import ErreurConfiguration
+from services.cache_service import CacheLectureUnique
+from services.energie_service import ServiceÉnergie
+from config import API_CONFIG, ESP32_CONFIG, DATA_DIR
+
+# Disposition fixe du bloc: [séquence u64][longueur u32][charge utile JSON]
+ENTÊTE = struct.Struct("<QI")
+
+
+class ÉtatPartagé:
+    """État de la serre dans un bloc de mémoire partagée protégé par un seqlock.
+
+    Un seul écrivain (le processus de contrôle) incrémente la séquence avant et
+    après l'écriture: une séquence impaire signale une écriture en cours, et un
+    lecteur recommence si la séquence a changé pendant sa copie.
+    """
+
+    def __init__(self, nom: Optional[str] = None, taille: Optional[int] = None):
+        self.logger = logging.getLogger("serre.etat_partage")
+        self.propriétaire = nom is None
+        if self.propriétaire:
+            taille = taille or int(API_CONFIG['taille_etat_partage'])
+            self._shm = shared_memory.SharedMemory(create=True, size=ENTÊTE.size + taille)
+            ENTÊTE.pack_into(self._shm.buf, 0, 0, 0)
+        else:
+            self._shm = shared_memory.SharedMemory(name=nom)
+        self.capacité = self._shm.size - ENTÊTE.size
+        self._séquence = 0
+
+    @property
+    def nom(self) -> str:
+        return self._shm.name
+
+    def publier(self, état: Dict[str, Any]) -> bool:
+        charge = json.dumps(état, separators=(",", ":")).encode("utf-8")
+        if len(charge) > self.capacité:
+            self.logger.error(
+                f"État trop volumineux pour la mémoire partagée: {len(charge)} > {self.capacité} octets"
+            )
+            return False
+        buf = self._shm.buf
+        self._séquence += 1
+        struct.pack_into("<Q", buf, 0, self._séquence)
+        buf[ENTÊTE.size:ENTÊTE.size + len(charge)] = charge
+        struct.pack_into("<I", buf, 8, len(charge))
+        self._séquence += 1
+        struct.pack_into("<Q", buf, 0, self._séquence)
+        return True
+
+    def lire(self, tentatives: int = 1000) -> Optional[Dict[str, Any]]:
+        buf = self._shm.buf
+        for _ in range(tentatives):
+            avant, longueur = ENTÊTE.unpack_from(buf, 0)
+            if avant & 1:
+                time.sleep(0)
+                continue
+            charge = bytes(buf[ENTÊTE.size:ENTÊTE.size + longueur])
+            après, = struct.unpack_from("<Q", buf, 0)
+            if avant == après:
+                return json.loads(charge) if longueur else None
+        raise ErreurConfiguration("Lecture de l'état partagé impossible: écrivain bloqué")
+
+    def séquence_publiée(self) -> int:
+        séquence, = struct.unpack_from("<Q", self._shm.buf, 0)
+        return séquence
+
+    def attendre_publication(self, après: int, délai: float) -> bool:
+        """Attend qu'une publication postérieure à la séquence `après` soit terminée."""
+        limite = time.monotonic() + délai
+        while time.monotonic() < limite:
+            séquence = self.séquence_publiée()
+            if séquence > après and not séquence & 1:
+                return True
+            time.sleep(0.005)
+        return False
+
+    def fermer(self) -> None:
+        self._shm.close()
+        if self.propriétaire:
+            self._shm.unlink()
+
+
+class SerreDistante:
+    """Vue de la serre côté processus API: lit l'état partagé, envoie les commandes."""
+
+    def __init__(self, état: ÉtatPartagé, commandes):
+        self._état = état
+        self._commandes = commandes
+        # Coalesce les demandes de lecture fraîche avant de les transmettre par IPC
+        self._actualisation = CacheLectureUnique(
+            float(ESP32_CONFIG['ttl_lecture']), 0.0, 0.0
+        )
+
+    def _actualiser(self) -> int:
+        séquence = self._état.séquence_publiée()
+        self.envoyer_commande("actualiser")
+        délai = float(ESP32_CONFIG['timeout']) + float(ESP32_CONFIG['delai_lecture_lente'])
+        if not self._état.attendre_publication(séquence, délai):
+            raise ErreurConfiguration("Pas de réponse du processus de contrôle")
+        return self._état.séquence_publiée()
+
+    def obtenir_état(self, frais: bool = False) -> Dict[str, Any]:
+        if frais:
+            self._actualisation.obtenir(self._actualiser)
+        état = self._état.lire()
+        if état is None:
+            return {"erreur": "État non encore publié"}
+        return état
+
+    def énergie_relais(self) -> Dict[str, Any]:
+        # Compteurs sauvegardés au dernier cycle de contrôle, relais actifs comptés jusqu'à maintenant
+        return ServiceÉnergie(fichier=DATA_DIR / "energie.bin").to_dict()
+
+    def métriques(self) -> str:
+        return ServiceÉnergie(fichier=DATA_DIR / "energie.bin").métriques()
+
+    def envoyer_commande(self, commande: str, **arguments) -> None:
+        # Jamais bloquant: un processus de contrôle figé ne doit pas immobiliser les workers de l'API
+        try:
+            self._commandes.put_nowait((commande, arguments))
+        except queue.Full:
+            raise ErreurConfiguration("File de commandes du processus de contrôle pleine")
+
+    def forcer_relais(self, nom_relais: str, activer: bool, durée: float) -> None:
+        self.envoyer_commande("forcer_relais", nom_relais=nom_relais, activer=activer, durée=durée)
+
+    def libérer_relais(self, nom_relais: str) -> None:
+        self.envoyer_commande("libérer_relais", nom_relais=nom_relais)
+
+
+class RécepteurCommandes:
+    """Consomme la file de commandes IPC dans le processus de contrôle."""
+
+    def __init__(self, commandes, gestionnaires: Dict[str, Callable[..., Any]]):
+        self.logger = logging.getLogger("serre.etat_partage")
+        self._commandes = commandes
+        self.gestionnaires = gestionnaires
+        self._thread: Optional[threading.Thread] = None
+        self._arrêt = threading.Event()
+
+    def démarrer(self) -> None:
+        self._thread = threading.Thread(target=self._consommer, daemon=True)
+        self._thread.start()
+
+    def arrêter(self) -> None:
+        # Jamais bloquant: file pleine ou consommateur figé ne doivent pas retarder l'arrêt
+        self._arrêt.set()
+        try:
+            self._commandes.put_nowait(None)
+        except queue.Full:
+            self.logger.warning("File de commandes pleine à l'arrêt")
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _consommer(self) -> None:
+        while True:
+            try:
+                message = self._commandes.get(timeout=0.5)
+            except queue.Empty:
+                if self._arrêt.is_set():
+                    return
+                continue
+            if message is None:
+                return
+            nom, arguments = message
+            gestionnaire = self.gestionnaires.get(nom)
+            if gestionnaire is None:
+                self.logger.warning(f"Commande inconnue reçue: {nom}")
+                continue
+            try:
+                gestionnaire(**arguments)
+            except Exception as e:
+                self.logger.error(f"Erreur exécution commande {nom}: {str(e)}")
+
+
+def _exécuter_api(nom_état: str, commandes) -> None:
+    from services.logging_service import ServiceLogging
+    from controllers.api_controller import ControleurAPI
+
+    ServiceLogging("serre.api")
+    état = ÉtatPartagé(nom=nom_état)
+    try:
+        # Les routes mémoire décrivent ce processus: la boucle de contrôle a sa propre surveillance
+        ControleurAPI(SerreDistante(état, commandes)).démarrer()
+    finally:
+        état.fermer()
+
+
+class ProcessusAPI:
+    """Exécute le serveur Flask dans un processus séparé du contrôle."""
+
+    def __init__(self, état: ÉtatPartagé):
+        self.logger = logging.getLogger("serre.etat_partage")
+        self._contexte = multiprocessing.get_context("spawn")
+        self.état = état
+        self.commandes = self._contexte.Queue(maxsize=64)
+        self._processus: Optional[multiprocessing.process.BaseProcess] = None
+        self.redémarrages = 0
+
+    def démarrer(self) -> None:
+        self._processus = self._contexte.Process(
+            target=_exécuter_api,
+            args=(self.état.nom, self.commandes),
+            name="serre-api",
+            daemon=True
+        )
+        self._processus.start()
+        self.logger.info(f"Processus API démarré (PID {self._processus.pid})")
+
+    def est_actif(self) -> bool:
+        return self._processus is not None and self._processus.is_alive()
+
+    def surveiller(self) -> bool:
+        """Relance le processus API s'il s'est arrêté; indique s'il a fallu le relancer."""
+        if self._processus is None or self.est_actif():
+            return False
+        self.logger.error(f"Processus API arrêté (code {self._processus.exitcode}), relance")
+        self.redémarrages += 1
+        self.démarrer()
+        return True
+
+    def arrêter(self) -> None:
+        if self._processus and self._processus.is_alive():
+            self._processus.terminate()
+            self._processus.join(timeout=5)
+        self.logger.info("Processus API arrêté")
@@ -0,0 +1,28 @@
+import os
+from pathlib import Path
+from typing import BinaryIO, Union
+
+
+def tronquer_incomplet(f: BinaryIO, taille_entrée: int) -> int:
+    """Ramène un fichier d'entrées de taille fixe à sa dernière entrée complète.
+
+    Une écriture interrompue (coupure, disque plein) laisse une entrée partielle
+    qui décalerait toutes les suivantes. Renvoie le nombre d'octets retirés.
+    """
+    fin = f.seek(0, os.SEEK_END)
+    reste = fin % taille_entrée
+    if reste:
+        f.truncate(fin - reste)
+    return reste
+
+
+def écrire_atomiquement(chemin: Path, données: Union[bytes, str]) -> None:
+    """Remplace le contenu d'un fichier via un fichier temporaire voisin et `os.replace`:
+    un arrêt brutal laisse l'ancienne version ou la nouvelle, jamais un mélange."""
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    temporaire = chemin.with_suffix(chemin.suffix + ".tmp")
+    if isinstance(données, str):
+        temporaire.write_text(données, encoding="utf-8")
+    else:
+        temporaire.write_bytes(données)
+    os.replace(temporaire, chemin)
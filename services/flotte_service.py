@@ -0,0 +1,301 @@
+import asyncio
+import json
+import random
+import threading
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from models.exceptions import ErreurConfiguration
+from services.serialisation_service import FragmentJSON
+from config import FLOTTE_CONFIG, API_CONFIG
+
+
+@dataclass
+class RéponseHTTP:
+    statut: int
+    entêtes: Dict[str, str]
+    corps: bytes
+
+
+class ConnexionHôte:
+    """Connexion HTTP/1.1 persistante (keep-alive) vers une serre."""
+
+    def __init__(self, hôte: str, port: int):
+        self.hôte = hôte
+        self.port = port
+        self._lecteur: Optional[asyncio.StreamReader] = None
+        self._écrivain: Optional[asyncio.StreamWriter] = None
+
+    @property
+    def ouverte(self) -> bool:
+        return self._écrivain is not None and not self._écrivain.is_closing()
+
+    def fermer(self) -> None:
+        if self._écrivain is not None:
+            self._écrivain.close()
+        self._lecteur = self._écrivain = None
+
+    async def obtenir(self, chemin: str, entêtes: Dict[str, str]) -> RéponseHTTP:
+        réutilisée = self.ouverte
+        try:
+            return await self._échanger(chemin, entêtes)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.fermer()
+            if not réutilisée:
+                raise
+            # Connexion keep-alive fermée par le serveur entre deux requêtes
+            return await self._échanger(chemin, entêtes)
+        except BaseException:
+            self.fermer()
+            raise
+
+    async def _échanger(self, chemin: str, entêtes: Dict[str, str]) -> RéponseHTTP:
+        if not self.ouverte:
+            self._lecteur, self._écrivain = await asyncio.open_connection(self.hôte, self.port)
+        lignes = [
+            f"GET {chemin} HTTP/1.1",
+            f"Host: {self.hôte}:{self.port}",
+            "Connection: keep-alive",
+            "Accept: application/json",
+        ]
+        lignes += [f"{nom}: {valeur}" for nom, valeur in entêtes.items()]
+        self._écrivain.write(("\r\n".join(lignes) + "\r\n\r\n").encode("latin-1"))
+        await self._écrivain.drain()
+
+        ligne_statut = await self._lecteur.readline()
+        if not ligne_statut:
+            raise ConnectionResetError("Connexion fermée par le serveur")
+        version, statut = ligne_statut.decode("latin-1").split(" ", 2)[:2]
+        reçus: Dict[str, str] = {}
+        while True:
+            ligne = await self._lecteur.readline()
+            if ligne in (b"\r\n", b"\n", b""):
+                break
+            nom, _, valeur = ligne.decode("latin-1").partition(":")
+            reçus[nom.strip().lower()] = valeur.strip()
+
+        code = int(statut)
+        if code in (204, 304) or 100 <= code < 200:
+            corps = b""
+        elif "content-length" in reçus:
+            corps = await self._lecteur.readexactly(int(reçus["content-length"]))
+        elif reçus.get("transfer-encoding", "").lower() == "chunked":
+            corps = await self._lire_morceaux()
+        else:
+            corps = await self._lecteur.read()
+            self.fermer()
+
+        connexion = reçus.get("connection", "").lower()
+        if connexion == "close" or (version == "HTTP/1.0" and connexion != "keep-alive"):
+            self.fermer()
+        return RéponseHTTP(code, reçus, corps)
+
+    async def _lire_morceaux(self) -> bytes:
+        morceaux = []
+        while True:
+            taille = int((await self._lecteur.readline()).split(b";")[0], 16)
+            if taille == 0:
+                await self._lecteur.readline()
+                return b"".join(morceaux)
+            morceaux.append(await self._lecteur.readexactly(taille))
+            await self._lecteur.readline()
+
+
+@dataclass
+class ÉtatHôte:
+    nom: str
+    connexion: ConnexionHôte
+    etag: Optional[str] = None
+    dernier_modifié: Optional[str] = None
+    état: Optional[Dict[str, Any]] = None
+    corps: Optional[FragmentJSON] = None
+    dernière_réussite: Optional[float] = None
+    dernière_erreur: Optional[str] = None
+    échecs_consecutifs: int = 0
+    latence: Optional[float] = None
+    non_modifiés: int = 0
+    série: Deque[Tuple[float, Optional[float], Optional[float]]] = field(default_factory=deque)
+
+
+def analyser_hôte(nom: str) -> Tuple[str, int]:
+    """« hôte[:port] »; port de l'API des serres par défaut."""
+    hôte, séparateur, port = nom.rpartition(":")
+    if not séparateur:
+        return nom, int(API_CONFIG['port'])
+    if not hôte or not port.isdigit() or not 0 < int(port) < 65536:
+        raise ErreurConfiguration(f"Serre mal définie dans FLOTTE_CONFIG['hotes']: {nom!r}")
+    return hôte, int(port)
+
+
+def _valeur(état: Dict[str, Any], clé: str) -> Optional[float]:
+    try:
+        return float(état[clé])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class AgrégateurFlotte:
+    """Interroge en parallèle l'API de nombreuses serres et consolide leurs séries."""
+
+    def __init__(self, hôtes: Optional[List[str]] = None, intervalle: Optional[float] = None,
+                 timeout: Optional[float] = None, gigue: Optional[float] = None):
+        self.logger = logging.getLogger("serre.flotte")
+        if hôtes is None:
+            hôtes = [h.strip() for h in FLOTTE_CONFIG['hotes'].split(",") if h.strip()]
+        self.chemin = FLOTTE_CONFIG['chemin']
+        self.intervalle = intervalle if intervalle is not None else float(FLOTTE_CONFIG['intervalle'])
+        self.timeout = timeout if timeout is not None else float(FLOTTE_CONFIG['timeout'])
+        self.gigue = gigue if gigue is not None else float(FLOTTE_CONFIG['gigue'])
+        self.taille_série = int(FLOTTE_CONFIG['taille_serie'])
+        self._verrou = threading.Lock()
+        self.hôtes: Dict[str, ÉtatHôte] = {}
+        for nom in hôtes:
+            hôte, port = analyser_hôte(nom)
+            self.hôtes[nom] = ÉtatHôte(
+                nom, ConnexionHôte(hôte, int(port)), série=deque(maxlen=self.taille_série)
+            )
+        self._sémaphore: Optional[asyncio.Semaphore] = None
+
+    def _limiteur(self) -> asyncio.Semaphore:
+        if self._sémaphore is None:
+            self._sémaphore = asyncio.Semaphore(int(FLOTTE_CONFIG['concurrence_max']))
+        return self._sémaphore
+
+    async def interroger(self, hôte: ÉtatHôte) -> None:
+        entêtes = {}
+        if hôte.etag:
+            entêtes["If-None-Match"] = hôte.etag
+        if hôte.dernier_modifié:
+            entêtes["If-Modified-Since"] = hôte.dernier_modifié
+        début = time.monotonic()
+        try:
+            async with self._limiteur():
+                réponse = await asyncio.wait_for(
+                    hôte.connexion.obtenir(self.chemin, entêtes), self.timeout
+                )
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            hôte.connexion.fermer()
+            with self._verrou:
+                hôte.échecs_consecutifs += 1
+                hôte.dernière_erreur = str(e) or type(e).__name__
+            self.logger.debug(f"Échec interrogation {hôte.nom}: {hôte.dernière_erreur}")
+            return
+
+        état = None
+        if réponse.statut == 200:
+            try:
+                état = json.loads(réponse.corps)
+                if not isinstance(état, dict):
+                    raise ValueError("objet JSON attendu")
+            except ValueError as e:
+                with self._verrou:
+                    hôte.échecs_consecutifs += 1
+                    hôte.dernière_erreur = f"Corps invalide: {str(e)}"
+                self.logger.debug(f"Réponse invalide de {hôte.nom}: {hôte.dernière_erreur}")
+                return
+
+        maintenant = time.time()
+        with self._verrou:
+            hôte.latence = time.monotonic() - début
+            if réponse.statut == 304:
+                hôte.non_modifiés += 1
+                # Valeurs inchangées, mais le point compte dans la série consolidée
+                if hôte.état is not None:
+                    hôte.série.append(
+                        (maintenant, _valeur(hôte.état, "temperature"), _valeur(hôte.état, "humidite"))
+                    )
+            elif état is not None:
+                hôte.état = état
+                hôte.corps = FragmentJSON(réponse.corps)
+                hôte.etag = réponse.entêtes.get("etag")
+                hôte.dernier_modifié = réponse.entêtes.get("last-modified")
+                hôte.série.append(
+                    (maintenant, _valeur(hôte.état, "temperature"), _valeur(hôte.état, "humidite"))
+                )
+            else:
+                hôte.échecs_consecutifs += 1
+                hôte.dernière_erreur = f"HTTP {réponse.statut}"
+                return
+            hôte.dernière_réussite = maintenant
+            hôte.échecs_consecutifs = 0
+            hôte.dernière_erreur = None
+
+    async def balayer(self) -> None:
+        """Interroge une fois toutes les serres, en parallèle."""
+        résultats = await asyncio.gather(
+            *(self.interroger(h) for h in self.hôtes.values()), return_exceptions=True
+        )
+        for hôte, résultat in zip(self.hôtes.values(), résultats):
+            if isinstance(résultat, Exception):
+                self.logger.error(f"Erreur interrogation {hôte.nom}: {str(résultat)}")
+
+    async def _boucle_hôte(self, hôte: ÉtatHôte) -> None:
+        # Décalage initial aléatoire pour étaler les requêtes sur l'intervalle
+        await asyncio.sleep(random.uniform(0, self.intervalle))
+        while True:
+            try:
+                await self.interroger(hôte)
+            except Exception as e:
+                # Une serre défaillante ne doit pas arrêter l'agrégation des autres
+                self.logger.error(f"Erreur interrogation {hôte.nom}: {str(e)}")
+            await asyncio.sleep(self.intervalle * random.uniform(1 - self.gigue, 1 + self.gigue))
+
+    async def exécuter(self) -> None:
+        self.logger.info(f"Agrégation de {len(self.hôtes)} serre(s) toutes les {self.intervalle:.0f} s")
+        try:
+            await asyncio.gather(
+                *(self._boucle_hôte(h) for h in self.hôtes.values()), return_exceptions=True
+            )
+        finally:
+            for hôte in self.hôtes.values():
+                hôte.connexion.fermer()
+
+    def réduire(self, facteur: float = 0.5, minimum: int = 1) -> bool:
+        """Réduit la mémoire des séries conservées."""
+        with self._verrou:
+            taille = max(minimum, int(self.taille_série * facteur))
+            if taille >= self.taille_série:
+                return False
+            self.taille_série = taille
+            for hôte in self.hôtes.values():
+                hôte.série = deque(hôte.série, maxlen=self.taille_série)
+        return True
+
+    def _résumé_hôte(self, hôte: ÉtatHôte) -> Dict[str, Any]:
+        état = hôte.état or {}
+        return {
+            "en_ligne": hôte.échecs_consecutifs == 0 and hôte.dernière_réussite is not None,
+            "temperature": état.get("temperature"),
+            "humidite": état.get("humidite"),
+            "mode_securite": état.get("mode_securite"),
+            "derniere_reussite": hôte.dernière_réussite,
+            "echecs_consecutifs": hôte.échecs_consecutifs,
+            "derniere_erreur": hôte.dernière_erreur,
+            "latence_ms": None if hôte.latence is None else round(hôte.latence * 1000, 1),
+        }
+
+    def statut_flotte(self) -> Dict[str, Any]:
+        with self._verrou:
+            serres = {nom: self._résumé_hôte(h) for nom, h in self.hôtes.items()}
+        return {
+            "total": len(serres),
+            "en_ligne": sum(1 for s in serres.values() if s["en_ligne"]),
+            "mode_securite": sum(1 for s in serres.values() if s["mode_securite"]),
+            "serres": serres,
+        }
+
+    def détail_hôte(self, nom: str) -> Optional[Dict[str, Any]]:
+        hôte = self.hôtes.get(nom)
+        if hôte is None:
+            return None
+        with self._verrou:
+            détail = self._résumé_hôte(hôte)
+            # Corps reçu de la serre, renvoyé sans être réencodé
+            détail["etat"] = hôte.corps
+            détail["serie"] = [
+                {"horodatage": t, "temperature": temp, "humidite": hum}
+                for t, temp, hum in hôte.série
+            ]
+        return détail
@@ -0,0 +1,184 @@
+import csv
+import io
+import struct
+import time
+import zlib
+import logging
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from models.donnees_environnement import DonnéesEnvironnement
+from models.exceptions import ErreurConfiguration, ErreurValidation
+from services.fichiers_service import tronquer_incomplet
+from config import DATA_DIR, GPIO_CONFIG, HISTORIQUE_CONFIG
+
+# horodatage, température, humidité, pression, relais (bits), mode sécurité
+ENREGISTREMENT = struct.Struct("<dfffBB")
+RELAIS: Tuple[str, ...] = tuple(GPIO_CONFIG)
+COLONNES: Tuple[str, ...] = ("horodatage", "temperature", "humidite", "pression") + RELAIS + ("mode_securite",)
+
+Enregistrement = Tuple[float, float, float, float, int, int]
+
+
+def analyser_intervalle(début: Optional[str], fin: Optional[str]) -> Tuple[float, float]:
+    """Convertit des dates ISO 8601 en horodatages (par défaut: les dernières 24 h)."""
+    try:
+        t_fin = datetime.fromisoformat(fin).timestamp() if fin else time.time()
+        t_début = datetime.fromisoformat(début).timestamp() if début else t_fin - 86400
+    except ValueError as e:
+        raise ErreurValidation(f"Date invalide: {str(e)}")
+    if t_début > t_fin:
+        raise ErreurValidation("La date de début doit précéder la date de fin")
+    return t_début, t_fin
+
+
+class HistoriqueSerre:
+    """Stockage des lectures en fichiers journaliers d'enregistrements binaires de taille fixe."""
+
+    def __init__(self, dossier: Optional[Path] = None):
+        self.logger = logging.getLogger("serre.historique")
+        self.dossier = dossier or DATA_DIR / "historique"
+        self.taille_bloc = int(HISTORIQUE_CONFIG['taille_bloc'])
+        self._vérifiés: Set[Path] = set()
+
+    def _fichier(self, jour) -> Path:
+        return self.dossier / f"{jour.isoformat()}.bin"
+
+    def enregistrer(self, données: DonnéesEnvironnement, relais: Dict[str, bool],
+                    mode_sécurité: bool, horodatage: Optional[float] = None) -> None:
+        horodatage = time.time() if horodatage is None else horodatage
+        bits = 0
+        for i, nom in enumerate(RELAIS):
+            if relais.get(nom):
+                bits |= 1 << i
+        try:
+            self.dossier.mkdir(parents=True, exist_ok=True)
+            jour = datetime.fromtimestamp(horodatage, timezone.utc).date()
+            fichier = self._fichier(jour)
+            with open(fichier, "ab") as f:
+                if fichier not in self._vérifiés:
+                    # Une fois par fichier: écarte une fin d'enregistrement laissée par un arrêt brutal
+                    retirés = tronquer_incomplet(f, ENREGISTREMENT.size)
+                    if retirés:
+                        self.logger.warning(f"Enregistrement incomplet retiré de {fichier.name} ({retirés} octets)")
+                    self._vérifiés.add(fichier)
+                f.write(ENREGISTREMENT.pack(
+                    horodatage, données.température, données.humidité,
+                    données.pression, bits, int(mode_sécurité)
+                ))
+        except Exception as e:
+            self.logger.error(f"Erreur enregistrement historique: {str(e)}")
+
+    def _premier_index(self, f, nombre: int, début: float) -> int:
+        """Recherche dichotomique du premier enregistrement >= début."""
+        bas, haut = 0, nombre
+        while bas < haut:
+            milieu = (bas + haut) // 2
+            f.seek(milieu * ENREGISTREMENT.size)
+            horodatage, = struct.unpack("<d", f.read(8))
+            if horodatage < début:
+                bas = milieu + 1
+            else:
+                haut = milieu
+        return bas
+
+    def lire(self, début: float, fin: float) -> Iterator[List[Enregistrement]]:
+        """Produit les enregistrements de [début, fin[ par blocs de taille bornée."""
+        jour = datetime.fromtimestamp(début, timezone.utc).date()
+        dernier_jour = datetime.fromtimestamp(fin, timezone.utc).date()
+        while jour <= dernier_jour:
+            fichier = self._fichier(jour)
+            jour += timedelta(days=1)
+            if not fichier.exists():
+                continue
+            with open(fichier, "rb") as f:
+                nombre = fichier.stat().st_size // ENREGISTREMENT.size
+                index = self._premier_index(f, nombre, début)
+                f.seek(index * ENREGISTREMENT.size)
+                while index < nombre:
+                    lot = min(self.taille_bloc, nombre - index)
+                    données = f.read(lot * ENREGISTREMENT.size)
+                    index += lot
+                    bloc = [e for e in ENREGISTREMENT.iter_unpack(données) if e[0] < fin]
+                    if bloc:
+                        yield bloc
+                    if len(bloc) < lot:
+                        return
+
+    @staticmethod
+    def _ligne(enregistrement: Enregistrement) -> List:
+        horodatage, température, humidité, pression, bits, sécurité = enregistrement
+        return [
+            datetime.fromtimestamp(horodatage, timezone.utc).isoformat(),
+            round(température, 2), round(humidité, 2), round(pression, 1),
+            *(int(bool(bits & (1 << i))) for i in range(len(RELAIS))),
+            sécurité,
+        ]
+
+    def exporter_csv_gzip(self, début: float, fin: float) -> Iterator[bytes]:
+        """Export CSV compressé gzip, produit morceau par morceau."""
+        compresseur = zlib.compressobj(6, zlib.DEFLATED, 31)
+        tampon = io.StringIO()
+        écrivain = csv.writer(tampon)
+        écrivain.writerow(COLONNES)
+        for bloc in self.lire(début, fin):
+            écrivain.writerows(self._ligne(e) for e in bloc)
+            morceau = compresseur.compress(tampon.getvalue().encode("utf-8"))
+            tampon.seek(0)
+            tampon.truncate()
+            if morceau:
+                yield morceau
+            time.sleep(0)
+        yield compresseur.compress(tampon.getvalue().encode("utf-8")) + compresseur.flush()
+
+    def exporter_arrow(self, début: float, fin: float) -> Iterator[bytes]:
+        """Export columnaire au format Arrow IPC (flux), un lot par bloc."""
+        try:
+            import pyarrow
+        except ImportError:
+            raise ErreurConfiguration("Le format Arrow nécessite le paquet pyarrow")
+        return self._flux_arrow(pyarrow, début, fin)
+
+    def _flux_arrow(self, pa, début: float, fin: float) -> Iterator[bytes]:
+        champs = [
+            pa.field("horodatage", pa.timestamp("ms", tz="UTC")),
+            pa.field("temperature", pa.float32()),
+            pa.field("humidite", pa.float32()),
+            pa.field("pression", pa.float32()),
+        ]
+        champs += [pa.field(nom, pa.bool_()) for nom in RELAIS]
+        champs.append(pa.field("mode_securite", pa.bool_()))
+        schéma = pa.schema(champs)
+
+        morceaux: List[bytes] = []
+
+        class Collecteur(io.RawIOBase):
+            def writable(self) -> bool:
+                return True
+
+            def write(self, b) -> int:
+                morceaux.append(bytes(b))
+                return len(b)
+
+        écrivain = pa.ipc.new_stream(pa.PythonFile(Collecteur(), mode="w"), schéma)
+
+        def vider() -> bytes:
+            morceau = b"".join(morceaux)
+            morceaux.clear()
+            return morceau
+
+        for bloc in self.lire(début, fin):
+            colonnes = list(zip(*bloc))
+            tableaux = [
+                pa.array([int(t * 1000) for t in colonnes[0]], pa.timestamp("ms", tz="UTC")),
+                pa.array(colonnes[1], pa.float32()),
+                pa.array(colonnes[2], pa.float32()),
+                pa.array(colonnes[3], pa.float32()),
+            ]
+            tableaux += [pa.array([bool(b & (1 << i)) for b in colonnes[4]]) for i in range(len(RELAIS))]
+            tableaux.append(pa.array([bool(s) for s in colonnes[5]]))
+            écrivain.write_batch(pa.record_batch(tableaux, schema=schéma))
+            yield vider()
+            time.sleep(0)
+        écrivain.close()
+        yield vider()
@@ -0,0 +1,183 @@
+import json
+import threading
+import time
+import logging
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, Optional, Tuple
+from services.fichiers_service import écrire_atomiquement
+from config import LIMITATION_CONFIG
+
+
+@dataclass
+class SeauJetons:
+    capacité: float
+    débit: float
+    jetons: float
+    maj: float
+
+    def consommer(self, maintenant: float) -> bool:
+        """Recharge le seau puis tente de consommer un jeton (O(1))."""
+        if maintenant > self.maj:
+            self.jetons = min(self.capacité, self.jetons + (maintenant - self.maj) * self.débit)
+        self.maj = maintenant
+        if self.jetons >= 1.0:
+            self.jetons -= 1.0
+            return True
+        return False
+
+
+@dataclass
+class ÉtatAlerte:
+    seau: SeauJetons
+    événements: Deque[Tuple[float, Optional[float]]] = field(default_factory=deque)
+
+
+class LimiteurAlertes:
+    """Limitation par type d'alerte: seau à jetons, fenêtre glissante et persistance."""
+
+    def __init__(
+        self,
+        délai_min: float,
+        fichier: Optional[Path] = None,
+        rafale: Optional[int] = None,
+        fenêtre: Optional[float] = None,
+        max_types: Optional[int] = None,
+        max_événements: Optional[int] = None,
+    ):
+        self.logger = logging.getLogger("serre.limitation")
+        self.délai_min = max(float(délai_min), 1e-9)
+        self.rafale = rafale if rafale is not None else int(LIMITATION_CONFIG['rafale'])
+        self.fenêtre = fenêtre if fenêtre is not None else float(LIMITATION_CONFIG['fenetre_resume'])
+        self.max_types = max_types if max_types is not None else int(LIMITATION_CONFIG['max_types'])
+        self.max_événements = (
+            max_événements if max_événements is not None
+            else int(LIMITATION_CONFIG['max_evenements'])
+        )
+        self.fichier = fichier
+        self._états: "OrderedDict[str, ÉtatAlerte]" = OrderedDict()
+        # Réentrant: autoriser() note puis sauvegarde; réduire() vient du thread mémoire
+        self._verrou = threading.RLock()
+        self._charger()
+
+    def _nouvel_état(self, maintenant: float) -> ÉtatAlerte:
+        seau = SeauJetons(
+            capacité=float(self.rafale),
+            débit=1.0 / self.délai_min,
+            jetons=float(self.rafale),
+            maj=maintenant
+        )
+        return ÉtatAlerte(seau, deque(maxlen=self.max_événements))
+
+    def _état(self, type_alerte: str, maintenant: float) -> ÉtatAlerte:
+        état = self._états.get(type_alerte)
+        if état is None:
+            état = self._nouvel_état(maintenant)
+            self._états[type_alerte] = état
+            if len(self._états) > self.max_types:
+                type_évincé, _ = self._états.popitem(last=False)
+                self.logger.debug(f"Type d'alerte évincé: {type_évincé}")
+        else:
+            self._états.move_to_end(type_alerte)
+        return état
+
+    def _purger(self, état: ÉtatAlerte, maintenant: float) -> None:
+        limite = maintenant - self.fenêtre
+        événements = état.événements
+        while événements and événements[0][0] < limite:
+            événements.popleft()
+
+    def noter(self, type_alerte: str, valeur: Optional[float] = None,
+              maintenant: Optional[float] = None) -> None:
+        """Enregistre et persiste une occurrence de l'alerte dans la fenêtre glissante, sans envoi."""
+        maintenant = time.time() if maintenant is None else maintenant
+        with self._verrou:
+            état = self._état(type_alerte, maintenant)
+            état.événements.append((maintenant, valeur))
+            self._purger(état, maintenant)
+            self.sauvegarder()
+
+    def autoriser(self, type_alerte: str, valeur: Optional[float] = None,
+                  maintenant: Optional[float] = None, noter: bool = True) -> bool:
+        """Indique si l'alerte peut être envoyée; l'occurrence est enregistrée sauf si `noter` est faux."""
+        maintenant = time.time() if maintenant is None else maintenant
+        with self._verrou:
+            if noter:
+                self.noter(type_alerte, valeur, maintenant)
+            autorisée = self._état(type_alerte, maintenant).seau.consommer(maintenant)
+            if autorisée:
+                self.sauvegarder()
+        return autorisée
+
+    def résumé(self, type_alerte: str, unité: str = "",
+               maintenant: Optional[float] = None) -> Optional[str]:
+        """Résumé de la fenêtre glissante, ex: « temp_basse 14 fois en 60 min, min 14.2 °C »."""
+        maintenant = time.time() if maintenant is None else maintenant
+        with self._verrou:
+            état = self._états.get(type_alerte)
+            if état is None:
+                return None
+            self._purger(état, maintenant)
+            événements = list(état.événements)
+        if not événements:
+            return None
+        texte = f"{type_alerte} {len(événements)} fois en {self.fenêtre / 60:.0f} min"
+        valeurs = [v for _, v in événements if v is not None]
+        if valeurs:
+            suffixe = f" {unité}" if unité else ""
+            texte += f", min {min(valeurs):.1f}{suffixe}, max {max(valeurs):.1f}{suffixe}"
+        return texte
+
+    def réduire(self, facteur: float = 0.5, minimum: int = 1) -> bool:
+        """Réduit la mémoire occupée en ne gardant qu'une fraction des événements."""
+        with self._verrou:
+            taille = max(minimum, int(self.max_événements * facteur))
+            if taille >= self.max_événements:
+                return False
+            self.max_événements = taille
+            for état in self._états.values():
+                état.événements = deque(état.événements, maxlen=self.max_événements)
+        return True
+
+    def exporter(self) -> Dict[str, Dict]:
+        with self._verrou:
+            return {
+                type_alerte: {
+                    "jetons": état.seau.jetons,
+                    "maj": état.seau.maj,
+                    "evenements": list(état.événements),
+                }
+                for type_alerte, état in self._états.items()
+            }
+
+    def importer(self, données: Dict[str, Dict]) -> None:
+        with self._verrou:
+            for type_alerte, contenu in données.items():
+                état = self._nouvel_état(float(contenu["maj"]))
+                état.seau.jetons = min(état.seau.capacité, float(contenu["jetons"]))
+                état.événements.extend(
+                    (float(t), None if v is None else float(v))
+                    for t, v in contenu.get("evenements", [])
+                )
+                self._états[type_alerte] = état
+            while len(self._états) > self.max_types:
+                self._états.popitem(last=False)
+
+    def sauvegarder(self) -> None:
+        if self.fichier is None:
+            return
+        with self._verrou:
+            try:
+                écrire_atomiquement(self.fichier, json.dumps(self.exporter()))
+            except Exception as e:
+                self.logger.error(f"Erreur sauvegarde limitation: {str(e)}")
+
+    def _charger(self) -> None:
+        if self.fichier is None or not self.fichier.exists():
+            return
+        try:
+            self.importer(json.loads(self.fichier.read_text(encoding="utf-8")))
+            self.logger.info(f"État de limitation restauré: {len(self._états)} type(s)")
+        except Exception as e:
+            self.logger.error(f"Erreur lecture état de limitation: {str(e)}")
@@ -1,6 +1,265 @@
+import bisect
 import logging
+import struct
+from datetime import datetime
 from logging.handlers import RotatingFileHandler
-from config import LOG_DIR
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from models.exceptions import ErreurValidation
+from services.fichiers_service import tronquer_incomplet
+from config import LOG_DIR, JOURNAUX_CONFIG
+
+# Entrée d'index: horodatage, position et longueur dans le journal, niveau,
+# identifiants du logger et du type d'événement dans la table des noms
+ENTRÉE_INDEX = struct.Struct("<dIIBHH")
+
+
+def _chemin_index(chemin: Path) -> Path:
+    return chemin.with_name(chemin.name + ".idx")
+
+
+def _chemin_noms(base: Path) -> Path:
+    return base.with_name(base.name + ".noms")
+
+
+class GestionnaireIndexé(RotatingFileHandler):
+    """Journal rotatif doublé d'un index binaire par enregistrement.
+
+    Chaque fichier de journal a son index (serre.log.idx, serre.log.1.idx, ...)
+    qui suit les rotations. Les noms de loggers et de types d'événements sont
+    stockés une seule fois dans serre.log.noms. Le type d'événement vient de
+    l'attribut `evenement` (extra) ou, à défaut, de la fonction appelante.
+    """
+
+    def __init__(self, chemin: Path, maxBytes: int, backupCount: int):
+        super().__init__(chemin, maxBytes=maxBytes, backupCount=backupCount, encoding='utf-8')
+        self.chemin = Path(chemin)
+        self._noms: Dict[str, int] = {}
+        chemin_noms = _chemin_noms(self.chemin)
+        if chemin_noms.exists():
+            contenu = chemin_noms.read_bytes()
+            complet = contenu[:contenu.rfind(b"\n") + 1]
+            if len(complet) < len(contenu):
+                # Nom interrompu par un arrêt brutal: aucune entrée d'index ne le référence
+                chemin_noms.write_bytes(complet)
+            for i, nom in enumerate(complet.decode("utf-8").splitlines()):
+                self._noms[nom] = i
+        self._fichier_noms = open(chemin_noms, "a", encoding="utf-8")
+        self._index = open(_chemin_index(self.chemin), "ab")
+        # Une entrée partielle décalerait toutes les suivantes
+        tronquer_incomplet(self._index, ENTRÉE_INDEX.size)
+
+    def _identifiant(self, nom: str) -> int:
+        identifiant = self._noms.get(nom)
+        if identifiant is None:
+            identifiant = self._noms[nom] = len(self._noms)
+            self._fichier_noms.write(nom + "\n")
+            self._fichier_noms.flush()
+        return identifiant
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            début = self.stream.tell()
+            logging.FileHandler.emit(self, record)
+            longueur = self.stream.tell() - début
+            évènement = getattr(record, "evenement", record.funcName)
+            self._index.write(ENTRÉE_INDEX.pack(
+                record.created, début, longueur, record.levelno,
+                self._identifiant(record.name), self._identifiant(évènement)
+            ))
+            self._index.flush()
+        except Exception:
+            self.handleError(record)
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self._index.close()
+        for i in range(self.backupCount - 1, 0, -1):
+            source = _chemin_index(Path(self.rotation_filename(f"{self.baseFilename}.{i}")))
+            if source.exists():
+                source.replace(_chemin_index(Path(self.rotation_filename(f"{self.baseFilename}.{i + 1}"))))
+        index = _chemin_index(self.chemin)
+        if self.backupCount > 0 and index.exists():
+            index.replace(_chemin_index(Path(self.rotation_filename(f"{self.baseFilename}.1"))))
+        self._index = open(index, "wb")
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            self._index.close()
+            self._fichier_noms.close()
+        finally:
+            self.release()
+        super().close()
+
+
+class _VueIndex:
+    """Accès direct aux entrées d'un fichier d'index, triées par horodatage."""
+
+    def __init__(self, fichier):
+        self._fichier = fichier
+        fichier.seek(0, 2)
+        # Arrondi inférieur: une entrée en cours d'écriture est ignorée
+        self._taille = fichier.tell() // ENTRÉE_INDEX.size
+
+    def __len__(self) -> int:
+        return self._taille
+
+    def __getitem__(self, i: int) -> Tuple:
+        self._fichier.seek(i * ENTRÉE_INDEX.size)
+        return ENTRÉE_INDEX.unpack(self._fichier.read(ENTRÉE_INDEX.size))
+
+    def premier_après(self, horodatage: float) -> int:
+        return bisect.bisect_left(_Horodatages(self), horodatage)
+
+
+class _Horodatages:
+    def __init__(self, vue: _VueIndex):
+        self._vue = vue
+
+    def __len__(self) -> int:
+        return len(self._vue)
+
+    def __getitem__(self, i: int) -> float:
+        return self._vue[i][0]
+
+
+def analyser_niveau(niveau: Optional[str]) -> int:
+    if not niveau:
+        return logging.NOTSET
+    if niveau.isdigit():
+        return int(niveau)
+    valeur = logging.getLevelName(niveau.upper())
+    if not isinstance(valeur, int):
+        raise ErreurValidation(f"Niveau de journal inconnu: {niveau}")
+    return valeur
+
+
+def analyser_depuis(depuis: Optional[str]) -> float:
+    if not depuis:
+        return 0.0
+    try:
+        return float(depuis)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(depuis).timestamp()
+    except ValueError as e:
+        raise ErreurValidation(f"Date invalide: {str(e)}")
+
+
+class IndexJournaux:
+    """Recherche dans les journaux rotatifs à l'aide de leurs index."""
+
+    def __init__(self, chemin: Optional[Path] = None):
+        self.chemin = chemin or LOG_DIR / "serre.log"
+        self.limite_max = int(JOURNAUX_CONFIG['limite_page_max'])
+
+    def _fichiers(self) -> List[Path]:
+        """Journaux du plus ancien au plus récent."""
+        sauvegardes = []
+        for chemin in self.chemin.parent.glob(self.chemin.name + ".*"):
+            suffixe = chemin.name[len(self.chemin.name) + 1:]
+            if suffixe.isdigit():
+                sauvegardes.append((int(suffixe), chemin))
+        fichiers = [chemin for _, chemin in sorted(sauvegardes, reverse=True)]
+        return fichiers + [self.chemin]
+
+    def _noms(self) -> List[str]:
+        try:
+            return _chemin_noms(self.chemin).read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def _identifiants(noms: List[str], préfixe: Optional[str]) -> Optional[Set[int]]:
+        if not préfixe:
+            return None
+        return {i for i, nom in enumerate(noms) if nom == préfixe or nom.startswith(préfixe + ".")}
+
+    def _entrées(self, depuis: float) -> Iterator[Tuple[Path, Tuple]]:
+        for chemin in self._fichiers():
+            try:
+                index = open(_chemin_index(chemin), "rb")
+            except FileNotFoundError:
+                continue
+            with index:
+                vue = _VueIndex(index)
+                if not len(vue) or vue[len(vue) - 1][0] < depuis:
+                    continue
+                for i in range(vue.premier_après(depuis), len(vue)):
+                    yield chemin, vue[i]
+
+    def rechercher(self, niveau: Optional[str] = None, depuis: Optional[str] = None,
+                   contient: Optional[str] = None, logger: Optional[str] = None,
+                   évènement: Optional[str] = None, limite: Optional[int] = None,
+                   curseur: Optional[str] = None) -> Dict[str, Any]:
+        """Enregistrements correspondants, du plus ancien au plus récent, par page.
+
+        Le curseur `suivant` reprend après le dernier enregistrement renvoyé et
+        reste valable après une rotation.
+        """
+        niveau_min = analyser_niveau(niveau)
+        limite = min(limite or int(JOURNAUX_CONFIG['limite_page']), self.limite_max)
+        if limite <= 0:
+            raise ErreurValidation("La limite doit être positive")
+        t_depuis, déjà_vus = analyser_depuis(depuis), 0
+        if curseur:
+            try:
+                t_curseur, _, n = curseur.partition(":")
+                t_curseur, n = float(t_curseur), int(n)
+            except ValueError:
+                raise ErreurValidation(f"Curseur invalide: {curseur}")
+            if t_curseur >= t_depuis:
+                t_depuis, déjà_vus = t_curseur, n
+
+        noms = self._noms()
+        loggers = self._identifiants(noms, logger)
+        évènements = {i for i, nom in enumerate(noms) if nom == évènement} if évènement else None
+        résultats: List[Dict[str, Any]] = []
+        # Le curseur désigne le dernier renvoyé par son horodatage et son rang
+        # parmi les entrées de même horodatage, filtrées ou non
+        t_courant, rang, curseur_suivant = None, 0, None
+        ouvert: Optional[Tuple[Path, Any]] = None
+        try:
+            for chemin, (t, position, longueur, niv, id_logger, id_évènement) in self._entrées(t_depuis):
+                rang = rang + 1 if t == t_courant else 1
+                t_courant = t
+                if t == t_depuis and rang <= déjà_vus:
+                    continue
+                if niv < niveau_min:
+                    continue
+                if loggers is not None and id_logger not in loggers:
+                    continue
+                if évènements is not None and id_évènement not in évènements:
+                    continue
+                if ouvert is None or ouvert[0] != chemin:
+                    if ouvert is not None:
+                        ouvert[1].close()
+                    ouvert = (chemin, open(chemin, "rb"))
+                ouvert[1].seek(position)
+                message = ouvert[1].read(longueur).decode("utf-8", "replace").rstrip("\n")
+                if contient and contient not in message:
+                    continue
+                if len(résultats) == limite:
+                    return {"journaux": résultats, "suivant": curseur_suivant}
+                résultats.append({
+                    "horodatage": datetime.fromtimestamp(t).isoformat(),
+                    "niveau": logging.getLevelName(niv),
+                    "logger": noms[id_logger] if id_logger < len(noms) else None,
+                    "evenement": noms[id_évènement] if id_évènement < len(noms) else None,
+                    "message": message,
+                })
+                curseur_suivant = f"{t!r}:{rang}"
+        finally:
+            if ouvert is not None:
+                ouvert[1].close()
+        return {"journaux": résultats, "suivant": None}
+
 
 class ServiceLogging:
 
@@ -17,11 +276,10 @@ class ServiceLogging:
         
         LOG_DIR.mkdir(parents=True, exist_ok=True)
         
-        file_handler = RotatingFileHandler(
+        file_handler = GestionnaireIndexé(
             LOG_DIR / f"{self.nom_logger}.log",
-            maxBytes=1_000_000,
-            backupCount=5,
-            encoding='utf-8'
+            maxBytes=int(JOURNAUX_CONFIG['taille_max']),
+            backupCount=int(JOURNAUX_CONFIG['sauvegardes'])
         )
         file_handler.setFormatter(self.formatter)
         file_handler.setLevel(logging.INFO)
@@ -0,0 +1,183 @@
+import math
+import random
+import time
+import logging
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from models.exceptions import ErreurCapteur, ErreurConfiguration
+from config import ESP32_CONFIG, MATERIEL_CONFIG
+
+
+class GPIOReel:
+    """Accès aux broches via RPi.GPIO, importé uniquement lorsqu'il est utilisé."""
+
+    def __init__(self):
+        import RPi.GPIO as GPIO
+        self._gpio = GPIO
+        self.BCM = GPIO.BCM
+        self.OUT = GPIO.OUT
+        self.HIGH = GPIO.HIGH
+        self.LOW = GPIO.LOW
+
+    def __getattr__(self, nom: str) -> Any:
+        return getattr(self._gpio, nom)
+
+
+class GPIOFactice:
+    """Broches simulées en mémoire, sans matériel."""
+
+    __slots__ = ("broches",)
+    BCM = 11
+    OUT = 0
+    HIGH = 1
+    LOW = 0
+
+    def __init__(self):
+        self.broches: Dict[int, int] = {}
+
+    def setmode(self, mode: int) -> None:
+        pass
+
+    def setwarnings(self, actif: bool) -> None:
+        pass
+
+    def setup(self, pin: int, mode: int, initial: Optional[int] = None) -> None:
+        self.broches[pin] = self.HIGH if initial is None else initial
+
+    def output(self, pin: int, valeur: int) -> None:
+        self.broches[pin] = valeur
+
+    def input(self, pin: int) -> int:
+        return self.broches.get(pin, self.HIGH)
+
+    def cleanup(self) -> None:
+        self.broches.clear()
+
+
+class GPIOEnregistreur:
+    """Enveloppe un autre backend GPIO et mémorise les appels effectués."""
+
+    def __init__(self, gpio, capacité: int = 1000):
+        self._gpio = gpio
+        self.BCM = gpio.BCM
+        self.OUT = gpio.OUT
+        self.HIGH = gpio.HIGH
+        self.LOW = gpio.LOW
+        self.appels: Deque[Tuple[float, str, Tuple]] = deque(maxlen=capacité)
+
+    def __getattr__(self, nom: str) -> Any:
+        attribut = getattr(self._gpio, nom)
+        if not callable(attribut):
+            return attribut
+
+        def enregistrer(*args, **kwargs):
+            self.appels.append((time.time(), nom, args))
+            return attribut(*args, **kwargs)
+        return enregistrer
+
+    def réduire(self, facteur: float = 0.5, minimum: int = 1) -> bool:
+        taille = max(minimum, int(self.appels.maxlen * facteur))
+        if taille >= self.appels.maxlen:
+            return False
+        self.appels = deque(self.appels, maxlen=taille)
+        return True
+
+
+class CapteurESP32:
+    """Lecture du BME280 exposé en HTTP par l'ESP32."""
+
+    def __init__(self, url: Optional[str] = None, timeout: Optional[int] = None):
+        self.url = url or ESP32_CONFIG['url']
+        self.timeout = timeout or int(ESP32_CONFIG['timeout'])
+
+    def lire(self) -> Dict[str, float]:
+        import requests
+        response = requests.get(self.url, timeout=self.timeout)
+
+        if response.status_code != 200:
+            raise ErreurCapteur(f"Erreur HTTP: {response.status_code}")
+
+        données = response.json()
+        return {
+            'température': float(données['temperature']),
+            'humidité': float(données['humidite']),
+            'pression': float(données['pression']) * 10,
+        }
+
+
+class CapteurFactice:
+    """Capteur synthétique: cycle journalier, bruit et dérive reproductibles."""
+
+    __slots__ = ("_aléa", "horloge", "température_moyenne", "amplitude", "dérive", "_t0")
+
+    def __init__(self, graine: Optional[int] = None, horloge: Callable[[], float] = time.time,
+                 température_moyenne: float = 20.0, amplitude: float = 6.0, dérive: float = 0.0):
+        self._aléa = random.Random(graine)
+        self.horloge = horloge
+        self.température_moyenne = température_moyenne
+        self.amplitude = amplitude
+        self.dérive = dérive
+        # La dérive (°C/h) court depuis la création du capteur
+        self._t0 = horloge()
+
+    def lire(self) -> Dict[str, float]:
+        t = self.horloge()
+        phase = 2 * math.pi * ((t % 86400) / 86400 - 0.375)
+        température = (
+            self.température_moyenne + self.amplitude * math.sin(phase)
+            + self.dérive * (t - self._t0) / 3600 + self._aléa.gauss(0, 0.2)
+        )
+        humidité = 55.0 - 1.5 * (température - self.température_moyenne) + self._aléa.gauss(0, 1.0)
+        return {
+            'température': min(max(température, -20.0), 50.0),
+            'humidité': min(max(humidité, 0.0), 100.0),
+            'pression': 1013.0 + self._aléa.gauss(0, 0.5),
+        }
+
+
+class CapteurEnregistreur:
+    """Enveloppe un autre capteur et mémorise les lectures."""
+
+    def __init__(self, capteur, capacité: int = 1000):
+        self._capteur = capteur
+        self.lectures: Deque[Tuple[float, Dict[str, float]]] = deque(maxlen=capacité)
+
+    def lire(self) -> Dict[str, float]:
+        mesures = self._capteur.lire()
+        self.lectures.append((time.time(), mesures))
+        return mesures
+
+    def réduire(self, facteur: float = 0.5, minimum: int = 1) -> bool:
+        taille = max(minimum, int(self.lectures.maxlen * facteur))
+        if taille >= self.lectures.maxlen:
+            return False
+        self.lectures = deque(self.lectures, maxlen=taille)
+        return True
+
+
+def créer_gpio(type_gpio: Optional[str] = None):
+    type_gpio = type_gpio or MATERIEL_CONFIG['gpio']
+    if type_gpio == "reel":
+        gpio = GPIOReel()
+    elif type_gpio == "factice":
+        gpio = GPIOFactice()
+    else:
+        raise ErreurConfiguration(f"Backend GPIO inconnu: {type_gpio}")
+    if MATERIEL_CONFIG['enregistrer'].lower() == "true":
+        gpio = GPIOEnregistreur(gpio)
+    logging.getLogger("serre.materiel").info(f"Backend GPIO: {type_gpio}")
+    return gpio
+
+
+def créer_capteur(type_capteur: Optional[str] = None):
+    type_capteur = type_capteur or MATERIEL_CONFIG['capteur']
+    if type_capteur == "esp32":
+        capteur = CapteurESP32()
+    elif type_capteur == "factice":
+        capteur = CapteurFactice()
+    else:
+        raise ErreurConfiguration(f"Backend capteur inconnu: {type_capteur}")
+    if MATERIEL_CONFIG['enregistrer'].lower() == "true":
+        capteur = CapteurEnregistreur(capteur)
+    logging.getLogger("serre.materiel").info(f"Backend capteur: {type_capteur}")
+    return capteur
@@ -0,0 +1,170 @@
+import gc
+import os
+import resource
+import threading
+import time
+import tracemalloc
+import logging
+from typing import Any, Dict, List, Optional, Set
+from config import MEMOIRE_CONFIG
+
+
+def rss_mo() -> float:
+    """Mémoire résidente du processus, en Mo."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1_048_576
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class ServiceMémoire:
+    """Instrumentation mémoire (RSS, GC, tracemalloc) et budget mémoire."""
+
+    def __init__(self, budget_mo: Optional[float] = None):
+        self.logger = logging.getLogger("serre.memoire")
+        self.budget_mo = budget_mo if budget_mo is not None else float(MEMOIRE_CONFIG['budget_mo'])
+        self.trames = int(MEMOIRE_CONFIG['trames_tracemalloc'])
+        self.durée_traçage = float(MEMOIRE_CONFIG['duree_tracemalloc'])
+        self.top = int(MEMOIRE_CONFIG['top'])
+        self.taille_min = int(MEMOIRE_CONFIG['taille_min_tampon'])
+        self.marge_réduction = float(MEMOIRE_CONFIG['marge_reduction_mo'])
+        self.réductibles: Dict[str, Any] = {}
+        self.minimums: Dict[str, int] = {}
+        self.réductions = 0
+        self._rss_réduction: Optional[float] = None
+        self._au_minimum: Set[str] = set()
+        self._référence: Optional[tracemalloc.Snapshot] = None
+        self._arrêt_traçage: Optional[threading.Timer] = None
+        self._verrou = threading.Lock()
+
+    def enregistrer_réductible(self, nom: str, objet: Any, minimum: Optional[int] = None) -> None:
+        """Enregistre un tampon en mémoire exposant réduire(facteur, minimum) -> bool."""
+        self.réductibles[nom] = objet
+        self.minimums[nom] = minimum if minimum is not None else self.taille_min
+
+    def statistiques(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "pid": os.getpid(),
+            "rss_mo": round(rss_mo(), 1),
+            "budget_mo": self.budget_mo,
+            "reductions": self.réductions,
+            "gc": {
+                "compteurs": list(gc.get_count()),
+                "collections": [g["collections"] for g in gc.get_stats()],
+                "non_collectables": len(gc.garbage),
+            },
+            "tracemalloc": tracemalloc.is_tracing(),
+        }
+        if tracemalloc.is_tracing():
+            courant, pic = tracemalloc.get_traced_memory()
+            stats["trace_mo"] = round(courant / 1_048_576, 2)
+            stats["trace_pic_mo"] = round(pic / 1_048_576, 2)
+        return stats
+
+    @staticmethod
+    def _filtrer(instantané: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+        return instantané.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def instantané(self, top: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Prend un instantané de référence et renvoie les principaux allocateurs.
+
+        tracemalloc s'arrête seul `duree_tracemalloc` secondes après le dernier instantané.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.trames)
+            self.logger.info(f"tracemalloc démarré ({self.trames} trames)")
+        with self._verrou:
+            if self._arrêt_traçage is not None:
+                self._arrêt_traçage.cancel()
+            self._arrêt_traçage = threading.Timer(self.durée_traçage, self.arrêter_traçage)
+            self._arrêt_traçage.daemon = True
+            self._arrêt_traçage.start()
+            self._référence = self._filtrer(tracemalloc.take_snapshot())
+            stats = self._référence.statistics("lineno")
+        return [
+            {"fichier": str(s.traceback), "taille_ko": round(s.size / 1024, 1), "nombre": s.count}
+            for s in stats[:top or self.top]
+        ]
+
+    def diff(self, top: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Différence d'allocations depuis le dernier instantané."""
+        with self._verrou:
+            if self._référence is None or not tracemalloc.is_tracing():
+                return []
+            courant = self._filtrer(tracemalloc.take_snapshot())
+            stats = courant.compare_to(self._référence, "lineno")
+        return [
+            {
+                "fichier": str(s.traceback),
+                "taille_ko": round(s.size / 1024, 1),
+                "diff_ko": round(s.size_diff / 1024, 1),
+                "diff_nombre": s.count_diff,
+            }
+            for s in stats[:top or self.top]
+        ]
+
+    def arrêter_traçage(self) -> None:
+        with self._verrou:
+            if self._arrêt_traçage is not None:
+                self._arrêt_traçage.cancel()
+                self._arrêt_traçage = None
+            self._référence = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self.logger.info("tracemalloc arrêté")
+
+    def vérifier_budget(self) -> bool:
+        """Réduit les tampons enregistrés si le budget est dépassé.
+
+        Le RSS baisse rarement après libération: une nouvelle réduction n'a lieu
+        que s'il a encore augmenté depuis la précédente.
+        """
+        rss = rss_mo()
+        if rss <= self.budget_mo:
+            self._rss_réduction = None
+            return False
+        if self._rss_réduction is not None and rss <= self._rss_réduction + self.marge_réduction:
+            self.logger.debug(f"RSS stable depuis la dernière réduction ({rss:.1f} Mo), tampons conservés")
+            return False
+        self.logger.warning(f"Budget mémoire dépassé: {rss:.1f} Mo > {self.budget_mo:.0f} Mo")
+        for nom, objet in self.réductibles.items():
+            try:
+                if objet.réduire(0.5, self.minimums[nom]):
+                    self.logger.info(f"Tampon réduit: {nom}")
+                elif nom not in self._au_minimum:
+                    self._au_minimum.add(nom)
+                    self.logger.warning(f"Tampon {nom} à sa taille minimale ({self.minimums[nom]})")
+            except Exception as e:
+                self.logger.error(f"Erreur réduction {nom}: {str(e)}")
+        gc.collect()
+        self._rss_réduction = rss_mo()
+        self.réductions += 1
+        return True
+
+    def journaliser(self) -> None:
+        stats = self.statistiques()
+        self.logger.info(
+            f"Mémoire: RSS {stats['rss_mo']} Mo / budget {self.budget_mo:.0f} Mo, "
+            f"GC {stats['gc']['compteurs']} collections {stats['gc']['collections']}"
+        )
+
+    def démarrer_surveillance(self, intervalle: Optional[float] = None) -> threading.Thread:
+        intervalle = intervalle or float(MEMOIRE_CONFIG['intervalle_journal'])
+
+        def surveiller() -> None:
+            while True:
+                try:
+                    self.journaliser()
+                    self.vérifier_budget()
+                except Exception as e:
+                    self.logger.error(f"Erreur surveillance mémoire: {str(e)}")
+                time.sleep(intervalle)
+
+        thread = threading.Thread(target=surveiller, name="memoire", daemon=True)
+        thread.start()
+        return thread
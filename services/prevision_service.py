@@ -0,0 +1,176 @@
+import math
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from services.historique_service import RELAIS
+from config import PREVISION_CONFIG
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+JOUR = 86400.0
+BIT_CHAUFFAGE = 1 << RELAIS.index('chauffage')
+BIT_VENTILATION = 1 << RELAIS.index('ventilation')
+
+
+def construire_jeu(t, température, chauffage, ventilation, horizon: float, retard: float,
+                   tolérance: float) -> Tuple[Any, Any, Any]:
+    """Jeu d'apprentissage vectorisé: X(t) -> T(t + horizon) - T(t).
+
+    Colonnes de X: constante, T(t), tendance T(t) - T(t - retard), heure du jour
+    (sinus, cosinus), part du temps où chauffage et ventilation ont fonctionné
+    pendant l'horizon. Renvoie aussi les horodatages des lignes retenues.
+    """
+    indices = np.arange(len(t))
+    i_futur = np.minimum(np.searchsorted(t, t + horizon), len(t) - 1)
+    i_passé = np.minimum(np.searchsorted(t, t - retard), len(t) - 1)
+    valides = (
+        (np.abs(t[i_futur] - (t + horizon)) <= tolérance)
+        & (np.abs(t[i_passé] - (t - retard)) <= tolérance)
+        & (i_futur > indices)
+    )
+    durées = np.diff(t, append=t[-1])
+    écart = np.maximum(t[i_futur] - t, 1e-9)
+
+    def part_active(état):
+        cumul = np.concatenate(([0.0], np.cumsum(état * durées)))
+        return (cumul[i_futur] - cumul[indices]) / écart
+
+    X = caractéristiques(
+        t, température, température - température[i_passé], part_active(chauffage), part_active(ventilation)
+    )
+    return X[valides], (température[i_futur] - température)[valides], t[valides]
+
+
+def caractéristiques(t, température, tendance, chauffage, ventilation):
+    phase = 2 * np.pi * (np.asarray(t) % JOUR) / JOUR
+    return np.column_stack((
+        np.ones_like(phase), température, tendance, np.sin(phase), np.cos(phase), chauffage, ventilation
+    ))
+
+
+class ServicePrévision:
+    """Prévision de température à court terme par moindres carrés sur l'historique récent.
+
+    Sans capteur extérieur, l'évolution de l'extérieur est approchée par les
+    termes d'heure du jour et par la tendance intérieure récente. La prévision
+    « libre » (chauffage et ventilation arrêtés) sert à anticiper leur mise en route.
+    """
+
+    def __init__(self, horloge: Callable[[], float] = time.time):
+        self.logger = logging.getLogger("serre.prevision")
+        self.horloge = horloge
+        self.horizon = float(PREVISION_CONFIG['horizon'])
+        self.fenêtre = float(PREVISION_CONFIG['fenetre'])
+        self.période_ajustement = float(PREVISION_CONFIG['periode_ajustement'])
+        self.retard = float(PREVISION_CONFIG['retard_tendance'])
+        self.tolérance = float(PREVISION_CONFIG['tolerance'])
+        self.échantillons_min = int(PREVISION_CONFIG['echantillons_min'])
+        self.disponible = np is not None and PREVISION_CONFIG['anticipation'].lower() == "true"
+        self._échantillons: Deque[Tuple[float, float, bool, bool]] = deque()
+        # Protège la fenêtre, réduite par la surveillance mémoire depuis un autre thread
+        self._verrou = threading.Lock()
+        self.coefficients = None
+        self._dernier_ajustement = -math.inf
+        self.durée_ajustement: Optional[float] = None
+        self.rmse: Optional[float] = None
+        if np is None:
+            self.logger.info("NumPy absent: prévision et anticipation désactivées")
+
+    def ajouter(self, température: float, chauffage: bool, ventilation: bool,
+                t: Optional[float] = None) -> None:
+        if not self.disponible:
+            return
+        t = self.horloge() if t is None else t
+        with self._verrou:
+            self._échantillons.append((t, température, chauffage, ventilation))
+            while self._échantillons[0][0] < t - self.fenêtre:
+                self._échantillons.popleft()
+        if t - self._dernier_ajustement >= self.période_ajustement:
+            self._dernier_ajustement = t
+            self.ajuster()
+
+    def amorcer(self, historique) -> None:
+        """Charge la fenêtre d'apprentissage depuis l'historique enregistré."""
+        if not self.disponible:
+            return
+        maintenant = self.horloge()
+        for bloc in historique.lire(maintenant - self.fenêtre, maintenant):
+            with self._verrou:
+                self._échantillons.extend(
+                    (e[0], e[1], bool(e[4] & BIT_CHAUFFAGE), bool(e[4] & BIT_VENTILATION)) for e in bloc
+                )
+        self._dernier_ajustement = maintenant
+        self.ajuster()
+        self.logger.info(f"Prévision amorcée sur {len(self._échantillons)} lectures")
+
+    def ajuster(self) -> bool:
+        if len(self._échantillons) < self.échantillons_min:
+            return False
+        début = time.perf_counter()
+        with self._verrou:
+            tableau = np.array(self._échantillons, dtype=float)
+        t, température, chauffage, ventilation = tableau.T
+        X, y, _ = construire_jeu(
+            t, température, chauffage, ventilation, self.horizon, self.retard, self.tolérance
+        )
+        if len(y) < self.échantillons_min:
+            return False
+        coefficients, _, rang, _ = np.linalg.lstsq(X, y, rcond=None)
+        if rang < X.shape[1] - 2:
+            # Chauffage ou ventilation jamais utilisés: colonnes nulles tolérées
+            return False
+        self.coefficients = coefficients
+        self.rmse = float(np.sqrt(np.mean((X @ coefficients - y) ** 2)))
+        self.durée_ajustement = time.perf_counter() - début
+        self.logger.debug(
+            f"Prévision ajustée sur {len(y)} points en {self.durée_ajustement * 1000:.1f} ms, "
+            f"RMSE {self.rmse:.2f}°C"
+        )
+        return True
+
+    def prévoir(self, température: float, chauffage: bool = False, ventilation: bool = False,
+                t: Optional[float] = None) -> Optional[float]:
+        """Température attendue dans `horizon` secondes, chauffage et ventilation maintenus
+        dans l'état donné (arrêtés par défaut)."""
+        if self.coefficients is None or not self._échantillons:
+            return None
+        t = self.horloge() if t is None else t
+        cible = t - self.retard
+        # Parcours depuis la fin: l'échantillon cherché date de quelques minutes
+        with self._verrou:
+            passé = next((e for e in reversed(self._échantillons) if e[0] <= cible), None)
+        if passé is None or abs(passé[0] - cible) > self.tolérance:
+            return None
+        x = caractéristiques(
+            [t], température, température - passé[1], float(chauffage), float(ventilation)
+        )[0]
+        return float(température + x @ self.coefficients)
+
+    def réduire(self, facteur: float = 0.5, minimum: int = 1) -> bool:
+        """Réduit la fenêtre d'apprentissage en gardant de quoi former `echantillons_min`
+        points, chacun demandant les lectures `retard` secondes avant et `horizon` après."""
+        with self._verrou:
+            actuelle = self._échantillons.maxlen or len(self._échantillons)
+            plancher = self.échantillons_min
+            if len(self._échantillons) > 1:
+                période = (self._échantillons[-1][0] - self._échantillons[0][0]) / (len(self._échantillons) - 1)
+                plancher += math.ceil((self.horizon + self.retard) / max(période, 1e-9))
+            taille = max(minimum, plancher, int(actuelle * facteur))
+            if taille >= actuelle:
+                return False
+            self._échantillons = deque(self._échantillons, maxlen=taille)
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "disponible": self.disponible and self.coefficients is not None,
+            "horizon_min": self.horizon / 60,
+            "echantillons": len(self._échantillons),
+            "rmse": None if self.rmse is None else round(self.rmse, 2),
+            "ajustement_ms": None if self.durée_ajustement is None else round(self.durée_ajustement * 1000, 2),
+        }
@@ -5,7 +5,8 @@ from typing import Optional
 from dataclasses import dataclass
 import logging
 from models.exceptions import ErreurNotification
-from config import PUSHOVER_CONFIG
+from services.limitation_service import LimiteurAlertes
+from config import PUSHOVER_CONFIG, DATA_DIR
 
 
 @dataclass
@@ -16,12 +17,15 @@ class NotificationMessage:
     son: Optional[str] = None
 
 class ServicePushover:
-    def __init__(self):
+    def __init__(self, limiteur: Optional[LimiteurAlertes] = None):
         self.app_token = PUSHOVER_CONFIG["app_token"]
         self.user_key = PUSHOVER_CONFIG["user_key"]
         self.delai_min_alerte = int(PUSHOVER_CONFIG["delai_min_alerte"])
         self.logger = logging.getLogger("serre.pushover")
-        self._dernière_alerte = {}
+        self.limiteur = limiteur or LimiteurAlertes(
+            self.delai_min_alerte,
+            fichier=DATA_DIR / "limitation.json"
+        )
         self._dernière_tentative = 0
         self.MIN_INTERVAL = 1
 
@@ -73,17 +77,15 @@ class ServicePushover:
                 
         return False
 
-    def peut_envoyer_alerte(self, type_alerte: str) -> bool:
-        maintenant = time.time()
-        if type_alerte not in self._dernière_alerte:
-            self._dernière_alerte[type_alerte] = 0
-            return True
-            
-        if maintenant - self._dernière_alerte[type_alerte] > self.delai_min_alerte:
-            self._dernière_alerte[type_alerte] = maintenant
-            return True
-            
-        return False
+    def peut_envoyer_alerte(self, type_alerte: str, valeur: Optional[float] = None,
+                            noter: bool = True) -> bool:
+        return self.limiteur.autoriser(type_alerte, valeur, noter=noter)
+
+    def noter_alerte(self, type_alerte: str, valeur: Optional[float] = None) -> None:
+        self.limiteur.noter(type_alerte, valeur)
+
+    def résumé_alerte(self, type_alerte: str, unité: str = "") -> Optional[str]:
+        return self.limiteur.résumé(type_alerte, unité)
 
     def _respecter_rate_limit(self) -> None:
         temps_écoulé = time.time() - self._dernière_tentative
@@ -0,0 +1,44 @@
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+from services.fichiers_service import écrire_atomiquement
+from config import REPRISE_CONFIG
+
+
+class PointDeReprise:
+    """Dernier état du contrôleur, réécrit à chaque cycle par remplacement atomique."""
+
+    def __init__(self, fichier: Optional[Path] = None, âge_max: Optional[float] = None,
+                 horloge: Callable[[], float] = time.time):
+        self.logger = logging.getLogger("serre.reprise")
+        self.fichier = fichier
+        self.âge_max = âge_max if âge_max is not None else float(REPRISE_CONFIG['age_max'])
+        self.horloge = horloge
+
+    def enregistrer(self, état: Dict[str, Any]) -> None:
+        if self.fichier is None:
+            return
+        try:
+            écrire_atomiquement(
+                self.fichier, json.dumps({"horodatage": self.horloge(), **état}, separators=(",", ":"))
+            )
+        except Exception as e:
+            self.logger.error(f"Erreur écriture point de reprise: {str(e)}")
+
+    def charger(self) -> Optional[Dict[str, Any]]:
+        """Renvoie le point de reprise s'il existe et n'est pas trop ancien."""
+        if self.fichier is None or not self.fichier.exists():
+            return None
+        try:
+            état = json.loads(self.fichier.read_text(encoding="utf-8"))
+            âge = self.horloge() - float(état["horodatage"])
+        except Exception as e:
+            self.logger.error(f"Point de reprise illisible: {str(e)}")
+            return None
+        if not 0 <= âge <= self.âge_max:
+            self.logger.info(f"Point de reprise ignoré (âge {âge:.0f}s)")
+            return None
+        self.logger.info(f"Reprise de l'état enregistré il y a {âge:.0f}s")
+        return état
@@ -0,0 +1,140 @@
+import json
+import zlib
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from flask import Flask, Response, request
+from config import API_CONFIG
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+TYPE_JSON = "application/json"
+TYPE_MSGPACK = "application/msgpack"
+
+# Préférence à q égal: le plus compact d'abord
+ENCODAGES: Tuple[str, ...] = (("br",) if brotli else ()) + ("gzip", "deflate")
+
+_ENCODEUR = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), check_circular=False)
+
+
+class FragmentJSON(bytes):
+    """Valeur JSON déjà encodée, insérée telle quelle dans la réponse."""
+
+
+class EncodeurJSON:
+    """Encodeur JSON compact réutilisant les clés déjà encodées.
+
+    Les valeurs de premier niveau de type FragmentJSON ne sont pas réencodées.
+    """
+
+    def __init__(self):
+        self._clés: Dict[str, bytes] = {}
+
+    def _clé(self, clé: str) -> bytes:
+        encodée = self._clés.get(clé)
+        if encodée is None:
+            encodée = self._clés[clé] = (_ENCODEUR.encode(clé) + ":").encode("utf-8")
+        return encodée
+
+    def encoder(self, valeur: Any) -> bytes:
+        if isinstance(valeur, FragmentJSON):
+            return bytes(valeur)
+        if not isinstance(valeur, dict) or not any(isinstance(v, FragmentJSON) for v in valeur.values()):
+            return _ENCODEUR.encode(valeur).encode("utf-8")
+        morceaux: List[bytes] = []
+        for clé, v in valeur.items():
+            morceaux.append(
+                self._clé(clé) + (v if isinstance(v, FragmentJSON) else _ENCODEUR.encode(v).encode("utf-8"))
+            )
+        return b"{" + b",".join(morceaux) + b"}"
+
+
+_encodeur = EncodeurJSON()
+
+
+def _sans_fragments(valeur: Any) -> Any:
+    if isinstance(valeur, FragmentJSON):
+        return json.loads(valeur)
+    if isinstance(valeur, dict):
+        return {clé: _sans_fragments(v) for clé, v in valeur.items()}
+    return valeur
+
+
+def encoder_msgpack(valeur: Any) -> bytes:
+    return msgpack.packb(_sans_fragments(valeur), use_bin_type=True)
+
+
+def négocier_encodage(accept_encoding: Optional[str]) -> Optional[str]:
+    """Choisit le codage de contenu le mieux noté parmi ceux supportés."""
+    if not accept_encoding:
+        return None
+    qualités: Dict[str, float] = {}
+    for élément in accept_encoding.split(","):
+        nom, _, paramètres = élément.strip().partition(";")
+        q = 1.0
+        paramètres = paramètres.strip()
+        if paramètres.startswith("q="):
+            try:
+                q = float(paramètres[2:])
+            except ValueError:
+                q = 0.0
+        qualités[nom.strip().lower()] = q
+    meilleur, meilleure_q = None, 0.0
+    for encodage in ENCODAGES:
+        q = qualités.get(encodage, qualités.get("*", 0.0))
+        if q > meilleure_q:
+            meilleur, meilleure_q = encodage, q
+    return meilleur
+
+
+def compresser(corps: bytes, encodage: str, niveau: Optional[int] = None) -> bytes:
+    niveau = niveau if niveau is not None else int(API_CONFIG['niveau_compression'])
+    if encodage == "br":
+        return brotli.compress(corps, quality=min(niveau, 11))
+    compresseur = zlib.compressobj(niveau, zlib.DEFLATED, 31 if encodage == "gzip" else 15)
+    return compresseur.compress(corps) + compresseur.flush()
+
+
+def répondre(données: Any) -> Response:
+    """Réponse JSON, ou MessagePack si le client le préfère et si msgpack est installé."""
+    if msgpack is None:
+        return Response(_encodeur.encoder(données), mimetype=TYPE_JSON)
+    if request.accept_mimetypes.best_match((TYPE_JSON, TYPE_MSGPACK)) == TYPE_MSGPACK:
+        réponse = Response(encoder_msgpack(données), mimetype=TYPE_MSGPACK)
+    else:
+        réponse = Response(_encodeur.encoder(données), mimetype=TYPE_JSON)
+    réponse.vary.add("Accept")
+    return réponse
+
+
+def _compresser_réponse(réponse: Response) -> Response:
+    if (réponse.direct_passthrough or réponse.is_streamed or réponse.status_code < 200
+            or réponse.status_code in (204, 304) or "Content-Encoding" in réponse.headers):
+        return réponse
+    réponse.vary.add("Accept-Encoding")
+    encodage = négocier_encodage(request.headers.get("Accept-Encoding"))
+    if encodage is None:
+        return réponse
+    corps = réponse.get_data()
+    if len(corps) < int(API_CONFIG['seuil_compression']):
+        return réponse
+    réponse.set_data(compresser(corps, encodage))
+    réponse.headers["Content-Encoding"] = encodage
+    etag, faible = réponse.get_etag()
+    if etag and not faible:
+        # Représentation différente du contenu non compressé
+        réponse.set_etag(etag, weak=True)
+    return réponse
+
+
+def installer_compression(app: Flask) -> None:
+    """Compresse les réponses de l'application selon l'en-tête Accept-Encoding."""
+    app.after_request(_compresser_réponse)
+    logging.getLogger("serre.api").debug(f"Compression HTTP: {', '.join(ENCODAGES)}")
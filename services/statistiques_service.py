@@ -0,0 +1,125 @@
+import time
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from models.donnees_environnement import DonnéesEnvironnement
+from config import STATISTIQUES_CONFIG
+
+
+class StatistiqueGlissante:
+    """Statistiques incrémentales O(1) amorti par échantillon: EWMA, min/max et pente."""
+
+    def __init__(self, alpha: float, fenêtre_min_max: float, fenêtre_pente: float):
+        self.alpha = alpha
+        self.fenêtre_min_max = fenêtre_min_max
+        self.fenêtre_pente = fenêtre_pente
+        self.ewma: Optional[float] = None
+        self.dernière: Optional[float] = None
+        self._min: Deque[Tuple[float, float]] = deque()
+        self._max: Deque[Tuple[float, float]] = deque()
+        self._échantillons: Deque[Tuple[float, float]] = deque()
+        self._origine = 0.0
+        self._st = self._sv = self._stt = self._stv = 0.0
+
+    def ajouter(self, t: float, valeur: float) -> None:
+        self.dernière = valeur
+        self.ewma = valeur if self.ewma is None else self.ewma + self.alpha * (valeur - self.ewma)
+
+        # Min/max glissants par deques monotones
+        while self._min and self._min[-1][1] >= valeur:
+            self._min.pop()
+        self._min.append((t, valeur))
+        while self._max and self._max[-1][1] <= valeur:
+            self._max.pop()
+        self._max.append((t, valeur))
+        limite = t - self.fenêtre_min_max
+        while self._min[0][0] < limite:
+            self._min.popleft()
+        while self._max[0][0] < limite:
+            self._max.popleft()
+
+        # Sommes de régression linéaire sur la fenêtre de pente
+        if not self._échantillons:
+            self._origine = t
+        x = t - self._origine
+        self._échantillons.append((x, valeur))
+        self._st += x
+        self._sv += valeur
+        self._stt += x * x
+        self._stv += x * valeur
+        limite = x - self.fenêtre_pente
+        while self._échantillons[0][0] < limite:
+            xa, va = self._échantillons.popleft()
+            self._st -= xa
+            self._sv -= va
+            self._stt -= xa * xa
+            self._stv -= xa * va
+        if x > 10 * self.fenêtre_pente:
+            self._recentrer()
+
+    def _recentrer(self) -> None:
+        """Déplace l'origine des temps et recalcule les sommes pour éliminer la dérive."""
+        décalage = self._échantillons[0][0]
+        self._origine += décalage
+        self._échantillons = deque((x - décalage, v) for x, v in self._échantillons)
+        self._st = self._sv = self._stt = self._stv = 0.0
+        for x, v in self._échantillons:
+            self._st += x
+            self._sv += v
+            self._stt += x * x
+            self._stv += x * v
+
+    @property
+    def minimum(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    @property
+    def maximum(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    @property
+    def pente(self) -> Optional[float]:
+        """Pente des moindres carrés sur la fenêtre, en unités par seconde."""
+        n = len(self._échantillons)
+        if n < int(STATISTIQUES_CONFIG['echantillons_min_pente']):
+            return None
+        dénominateur = n * self._stt - self._st * self._st
+        if dénominateur <= 0:
+            return None
+        return (n * self._stv - self._st * self._sv) / dénominateur
+
+    def variation_fenêtre(self) -> Optional[float]:
+        """Variation estimée sur la durée de la fenêtre de pente."""
+        pente = self.pente
+        return None if pente is None else pente * self.fenêtre_pente
+
+    def to_dict(self) -> Dict[str, Optional[float]]:
+        pente = self.pente
+        return {
+            "ewma": None if self.ewma is None else round(self.ewma, 2),
+            "min": self.minimum,
+            "max": self.maximum,
+            "pente_par_min": None if pente is None else round(pente * 60, 3),
+        }
+
+
+class ServiceStatistiques:
+
+    def __init__(self):
+        self.logger = logging.getLogger("serre.statistiques")
+        alpha = float(STATISTIQUES_CONFIG['alpha_ewma'])
+        fenêtre_min_max = float(STATISTIQUES_CONFIG['fenetre_min_max'])
+        fenêtre_pente = float(STATISTIQUES_CONFIG['fenetre_pente'])
+        self.température = StatistiqueGlissante(alpha, fenêtre_min_max, fenêtre_pente)
+        self.humidité = StatistiqueGlissante(alpha, fenêtre_min_max, fenêtre_pente)
+
+    def ajouter(self, données: DonnéesEnvironnement, t: Optional[float] = None) -> None:
+        t = time.monotonic() if t is None else t
+        self.température.ajouter(t, données.température)
+        self.humidité.ajouter(t, données.humidité)
+
+    def to_dict(self) -> Dict[str, Dict[str, Optional[float]]]:
+        return {
+            "temperature": self.température.to_dict(),
+            "humidite": self.humidité.to_dict(),
+        }
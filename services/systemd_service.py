@@ -1,9 +1,52 @@
 import signal
+import socket
 import sys
 import os
+import threading
+import time
 from typing import Optional, Callable
 import logging
-from config import PID_FILE
+from config import PID_FILE, WATCHDOG_CONFIG
+
+
+class SurveillanceÉchéance:
+    """Suivi des échéances de la boucle de contrôle."""
+
+    def __init__(self, période: Optional[float] = None, échéance: Optional[float] = None,
+                 marge: Optional[float] = None, horloge: Callable[[], float] = time.monotonic):
+        self.période = période if période is not None else float(WATCHDOG_CONFIG['periode_boucle'])
+        self.échéance = échéance if échéance is not None else float(WATCHDOG_CONFIG['echeance_cycle'])
+        self.marge = marge if marge is not None else float(WATCHDOG_CONFIG['marge'])
+        self.horloge = horloge
+        self.dernière_latence: Optional[float] = None
+        self.échéances_manquées = 0
+        self.cycles = 0
+        self._début: Optional[float] = None
+        self._dernière_fin = horloge()
+
+    def début_cycle(self) -> None:
+        self._début = self.horloge()
+
+    def fin_cycle(self) -> None:
+        maintenant = self.horloge()
+        if self._début is not None:
+            self.dernière_latence = maintenant - self._début
+            if self.dernière_latence > self.échéance:
+                self.échéances_manquées += 1
+        self._dernière_fin = maintenant
+        self.cycles += 1
+
+    def dans_les_délais(self) -> bool:
+        """Faux si la boucle n'a pas terminé de cycle depuis période + marge."""
+        return self.horloge() - self._dernière_fin <= self.période + self.marge
+
+    def statut(self) -> str:
+        latence = "N/A" if self.dernière_latence is None else f"{self.dernière_latence:.2f} s"
+        return (
+            f"Cycle {self.cycles}: latence {latence}, "
+            f"{self.échéances_manquées} échéance(s) manquée(s)"
+        )
+
 
 class ServiceSystemd:
 
@@ -22,6 +65,61 @@ class ServiceSystemd:
             self.logger.error(f"Erreur création fichier PID: {str(e)}")
             raise
 
+    def notifier(self, *messages: str) -> bool:
+        """Envoie un message sd_notify (READY=1, WATCHDOG=1, STATUS=...)."""
+        adresse = os.environ.get("NOTIFY_SOCKET")
+        if not adresse:
+            return False
+        if adresse.startswith("@"):
+            adresse = "\0" + adresse[1:]
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+                sock.sendto("\n".join(messages).encode("utf-8"), adresse)
+            return True
+        except OSError as e:
+            self.logger.error(f"Erreur notification systemd: {str(e)}")
+            return False
+
+    def intervalle_watchdog(self) -> Optional[float]:
+        """Demi-période du watchdog systemd, ou None si le watchdog est inactif."""
+        usec = os.environ.get("WATCHDOG_USEC")
+        pid = os.environ.get("WATCHDOG_PID")
+        if not usec or (pid and int(pid) != os.getpid()):
+            return None
+        return int(usec) / 2_000_000
+
+    def démarrer_watchdog(self, surveillance: SurveillanceÉchéance,
+                          en_retard: Optional[Callable[[], None]] = None) -> threading.Thread:
+        """Envoie WATCHDOG=1 tant que la boucle respecte ses échéances.
+
+        Lorsque la boucle est bloquée, les notifications cessent (systemd
+        redémarre alors le service) et en_retard est appelé une fois.
+        """
+        intervalle = self.intervalle_watchdog() or surveillance.marge / 2
+
+        def surveiller() -> None:
+            en_défaut = False
+            while not self.arret_en_cours:
+                if surveillance.dans_les_délais():
+                    en_défaut = False
+                    self.notifier("WATCHDOG=1", f"STATUS={surveillance.statut()}")
+                elif not en_défaut:
+                    en_défaut = True
+                    surveillance.échéances_manquées += 1
+                    self.logger.critical("Boucle de contrôle bloquée, arrêt des notifications watchdog")
+                    self.notifier(f"STATUS=Boucle bloquée - {surveillance.statut()}")
+                    if en_retard:
+                        try:
+                            en_retard()
+                        except Exception as e:
+                            self.logger.error(f"Erreur gestion retard: {str(e)}")
+                time.sleep(intervalle)
+
+        thread = threading.Thread(target=surveiller, name="watchdog", daemon=True)
+        thread.start()
+        self.logger.info(f"Surveillance watchdog démarrée (intervalle {intervalle:.1f} s)")
+        return thread
+
     def _configurer_signaux(self) -> None:
         signal.signal(signal.SIGTERM, self._gerer_arret)
         signal.signal(signal.SIGINT, self._gerer_arret)
@@ -31,6 +129,7 @@ class ServiceSystemd:
         nom_signal = 'SIGTERM' if signum == signal.SIGTERM else 'SIGINT'
         self.logger.info(f"Signal {nom_signal} reçu, début de l'arrêt gracieux")
         self.arret_en_cours = True
+        self.notifier("STOPPING=1")
 
         if self.gestion_nettoyage:
             try:
@@ -49,7 +49,8 @@ After=network.target
 StartLimitIntervalSec=0
 
 [Service]
-Type=simple
+Type=notify
+NotifyAccess=main
 User=$SUDO_USER
 Group=gpio
 WorkingDirectory=/home/$SUDO_USER
@@ -58,6 +59,7 @@ Environment=SERRE_CONFIG=/home/$SUDO_USER/serre/config.py
 ExecStart=/usr/bin/python3 /home/$SUDO_USER/serre/main.py
 Restart=always
 RestartSec=5
+WatchdogSec=120
 TimeoutStopSec=60
 StartLimitBurst=5
 StartLimitIntervalSec=300
@@ -74,6 +76,10 @@ log_message "Création des répertoires de logs..."
 mkdir -p /var/log/serre
 chown $SUDO_USER:$SUDO_USER /var/log/serre
 
+log_message "Création du répertoire de données..."
+mkdir -p /var/lib/serre
+chown $SUDO_USER:$SUDO_USER /var/lib/serre
+
 log_message "Rechargement de systemd..."
 systemctl daemon-reload
 systemctl enable serre.service || log_warning "Attention: Erreur lors de l'activation du service"
@@ -1,17 +1,27 @@
 import unittest
+import time
+import shutil
+import tempfile
+from pathlib import Path
 from unittest.mock import Mock, patch
 from controllers.serre_controller import ControleurSerre
 from controllers.api_controller import ControleurAPI, app
 from models.donnees_environnement import DonnéesEnvironnement
+from services.materiel_service import GPIOFactice, CapteurFactice
+from services.pushover_service import ServicePushover
+from services.limitation_service import LimiteurAlertes
+from services.historique_service import HistoriqueSerre
+from services.energie_service import ServiceÉnergie
+from services.reprise_service import PointDeReprise
+from services import serialisation_service
 from flask import Flask
-from config import API_CONFIG, GPIO_CONFIG
+import json
+from config import GPIO_CONFIG, SEUILS_ENVIRONNEMENT, STATISTIQUES_CONFIG
 
 
 class TestControleurSerre(unittest.TestCase):
     def setUp(self):
-        self.gpio_patcher = patch('controllers.serre_controller.GPIO', autospec=True)
-        self.mock_gpio = self.gpio_patcher.start()
-        self.addCleanup(self.gpio_patcher.stop)
+        self.mock_gpio = Mock(spec=GPIOFactice)
         
         self.pid_patcher = patch('services.systemd_service.PID_FILE')
         self.mock_pid_file = self.pid_patcher.start()
@@ -24,7 +34,16 @@ class TestControleurSerre(unittest.TestCase):
         self.mock_gpio.setup = Mock()
         self.mock_gpio.output = Mock()
         
-        self.controller = ControleurSerre()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.controller = ControleurSerre(
+            gpio=self.mock_gpio,
+            capteur=CapteurFactice(graine=1),
+            pushover=ServicePushover(LimiteurAlertes(30)),
+            historique=HistoriqueSerre(Path(self.temp_dir)),
+            énergie=ServiceÉnergie(),
+            reprise=PointDeReprise()
+        )
         
         self.données_test = DonnéesEnvironnement(
             température=20.0,
@@ -43,6 +62,145 @@ class TestControleurSerre(unittest.TestCase):
             expected_state
         )
 
+    def test_bail_prioritaire_sur_automatique(self):
+        self.controller.forcer_relais('chauffage', False, 600)
+        self.mock_gpio.reset_mock()
+
+        self.controller._gérer_chauffage(DonnéesEnvironnement(
+            température=10.0,
+            humidité=50.0,
+            pression=1013.0
+        ))
+
+        expected_state = 1 if self.controller.RELAIS_ACTIF_BAS else 0
+        self.mock_gpio.output.assert_called_once_with(
+            GPIO_CONFIG['chauffage'],
+            expected_state
+        )
+
+    def test_occurrences_alerte_comptees(self):
+        self.controller.pushover.envoyer_notification = Mock(return_value=True)
+        température = SEUILS_ENVIRONNEMENT['temp_critique_min'] - 1
+        for _ in range(3):
+            self.controller._gérer_alertes_température(température)
+        self.controller.pushover.envoyer_notification.assert_called_once()
+        self.assertTrue(
+            self.controller.pushover.résumé_alerte('temp_basse').startswith("temp_basse 3 fois")
+        )
+
+    def test_alerte_tendance_une_par_episode(self):
+        self.controller.pushover = ServicePushover(LimiteurAlertes(30, rafale=2))
+        self.controller.pushover.envoyer_notification = Mock(return_value=True)
+        seuil = float(STATISTIQUES_CONFIG['seuil_variation_temp'])
+        variations = [-seuil - 1] * 4 + [0.0] + [-seuil - 1] * 2
+        self.controller.statistiques.température.variation_fenêtre = Mock(side_effect=variations)
+        for _ in variations:
+            self.controller._gérer_alertes_tendance(15.0)
+        self.assertEqual(self.controller.pushover.envoyer_notification.call_count, 2)
+        self.assertTrue(self.controller.alerte_chute)
+        self.assertFalse(self.controller.alerte_hausse)
+
+    def test_chauffage_anticipe(self):
+        données = DonnéesEnvironnement(
+            température=SEUILS_ENVIRONNEMENT['temp_min'] + 1,
+            humidité=50.0,
+            pression=1013.0
+        )
+        self.mock_gpio.reset_mock()
+        self.controller._gérer_chauffage(données, prévue=SEUILS_ENVIRONNEMENT['temp_min'] - 1)
+
+        expected_state = 0 if self.controller.RELAIS_ACTIF_BAS else 1
+        self.mock_gpio.output.assert_called_once_with(GPIO_CONFIG['chauffage'], expected_state)
+
+        self.mock_gpio.reset_mock()
+        self.controller._gérer_chauffage(données, prévue=SEUILS_ENVIRONNEMENT['temp_min'] + 1)
+        self.mock_gpio.output.assert_called_once_with(GPIO_CONFIG['chauffage'], 1 - expected_state)
+
+class TestControleurSerreFactice(unittest.TestCase):
+    @patch('services.systemd_service.PID_FILE')
+    def setUp(self, mock_pid_file):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.gpio = GPIOFactice()
+        self.controller = ControleurSerre(
+            gpio=self.gpio,
+            capteur=CapteurFactice(graine=1, horloge=lambda: 43200.0),
+            pushover=ServicePushover(LimiteurAlertes(30)),
+            historique=HistoriqueSerre(Path(self.temp_dir)),
+            énergie=ServiceÉnergie(),
+            reprise=PointDeReprise()
+        )
+
+    def test_cycle_complet(self):
+        données = self.controller.lire_capteur()
+        self.controller.gérer_environnement(données)
+
+        état = self.controller.obtenir_état()
+        self.assertIsNone(état["erreur"])
+        self.assertEqual(état["temperature"], f"{données.température:.1f}")
+        self.assertEqual(
+            état["ventilation"],
+            not self.gpio.input(GPIO_CONFIG['ventilation'])
+        )
+
+    @patch('services.systemd_service.PID_FILE')
+    def test_reprise_a_chaud(self, mock_pid_file):
+        fichier = Path(self.temp_dir) / "reprise.json"
+        fichier_énergie = Path(self.temp_dir) / "energie.bin"
+        self.controller.reprise = PointDeReprise(fichier)
+        self.controller.énergie = ServiceÉnergie(fichier=fichier_énergie)
+        self.controller.gérer_environnement(self.controller.lire_capteur())
+        self.controller.forcer_relais('ventilation', True, 600)
+        self.controller.alerte_temp_basse = True
+        self.controller.enregistrer_reprise(echecs_consecutifs=2)
+        self.controller.énergie.sauvegarder()
+        états = self.controller.états_relais()
+        compteurs = self.controller.énergie.to_dict()["relais"]
+
+        gpio = GPIOFactice()
+        reprise = ControleurSerre(
+            gpio=gpio,
+            capteur=CapteurFactice(graine=1),
+            pushover=ServicePushover(LimiteurAlertes(30)),
+            historique=HistoriqueSerre(Path(self.temp_dir)),
+            énergie=ServiceÉnergie(fichier=fichier_énergie),
+            reprise=PointDeReprise(fichier)
+        )
+        self.assertEqual(reprise.états_relais(), états)
+        for nom, compteur in reprise.énergie.to_dict()["relais"].items():
+            self.assertEqual(compteur["commutations"], compteurs[nom]["commutations"])
+            self.assertEqual(compteur["actif"], états[nom])
+        self.assertTrue(reprise.alerte_temp_basse)
+        self.assertIsNotNone(reprise.baux.actif('ventilation'))
+        self.assertNotEqual(reprise.obtenir_état()["temperature"], "N/A")
+        self.assertEqual(reprise.point_restauré["echecs_consecutifs"], 2)
+
+        self.assertIsNone(PointDeReprise(fichier, horloge=lambda: time.time() + 3600).charger())
+
+    def test_instantane_publie(self):
+        from dataclasses import FrozenInstanceError
+        instantané = self.controller.instantané
+        self.controller._publier()
+        self.assertIs(self.controller.instantané, instantané)
+
+        self.controller.gérer_environnement(self.controller.lire_capteur())
+        nouveau = self.controller.instantané
+        self.assertGreater(nouveau.version, instantané.version)
+        self.assertEqual(dict(nouveau.relais), self.controller.états_relais())
+        self.assertEqual(self.controller.obtenir_état()["version"], nouveau.version)
+        with self.assertRaises(FrozenInstanceError):
+            nouveau.mode_sécurité = True
+        with self.assertRaises(TypeError):
+            nouveau.relais['chauffage'] = True
+
+    def test_lecture_partagee(self):
+        self.controller.capteur = Mock(wraps=self.controller.capteur)
+        données = self.controller.lire_capteur()
+        état = self.controller.obtenir_état(frais=True)
+        self.assertIs(self.controller.lire_capteur(), données)
+        self.assertEqual(état["temperature"], f"{données.température:.1f}")
+        self.controller.capteur.lire.assert_called_once()
+
 class TestControleurAPI(unittest.TestCase):
     @patch('services.systemd_service.PID_FILE')
     def setUp(self, mock_pid_file):
@@ -64,3 +222,88 @@ class TestControleurAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.get_json(), état_test)
 
+    def test_etat_serre_conditionnel(self):
+        self.serre_mock.obtenir_état.return_value = {
+            "temperature": "20.0",
+            "derniere_mise_a_jour": "2024-01-01T12:00:00",
+            "erreur": None
+        }
+        response = self.client.get('/api/serre')
+        etag = response.headers['ETag']
+
+        self.serre_mock.obtenir_état.return_value = {
+            "temperature": "20.0",
+            "derniere_mise_a_jour": "2024-01-01T12:01:00",
+            "erreur": None
+        }
+        response = self.client.get('/api/serre', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_etat_serre_compresse(self):
+        import gzip
+        état_test = {"temperature": "20.0", "statistiques": {"x": "y" * 2000}, "erreur": None}
+        self.serre_mock.obtenir_état.return_value = état_test
+        response = self.client.get('/api/serre', headers={'Accept-Encoding': 'gzip, deflate;q=0.5'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.get_data())), état_test)
+
+        etag = response.headers['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        response = self.client.get(
+            '/api/serre', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    @unittest.skipUnless(serialisation_service.msgpack, "msgpack non installé")
+    def test_etat_serre_msgpack(self):
+        état_test = {"temperature": "20.0", "erreur": None}
+        self.serre_mock.obtenir_état.return_value = état_test
+        response = self.client.get('/api/serre', headers={'Accept': 'application/msgpack'})
+        self.assertEqual(response.mimetype, 'application/msgpack')
+        self.assertEqual(serialisation_service.msgpack.unpackb(response.get_data()), état_test)
+
+    def test_journaux_niveau_invalide(self):
+        response = self.client.get('/api/serre/journaux?niveau=BAVARD')
+        self.assertEqual(response.status_code, 400)
+
+    def test_etat_serre_etag_version(self):
+        self.serre_mock.obtenir_état.return_value = {
+            "temperature": "20.0", "version": 3, "generation": "ab12", "erreur": None
+        }
+        response = self.client.get('/api/serre')
+        self.assertEqual(response.headers['ETag'], '"ab12-3"')
+
+    def test_etat_serre_frais(self):
+        self.serre_mock.obtenir_état.return_value = {"temperature": "20.0", "erreur": None}
+        self.client.get('/api/serre?frais=1')
+        self.serre_mock.obtenir_état.assert_called_once_with(frais=True)
+
+    def test_forcer_relais(self):
+        self.serre_mock.forcer_relais.return_value = None
+        response = self.client.post(
+            '/api/serre/relais/ventilation',
+            json={"etat": True, "duree": 600}
+        )
+        self.assertEqual(response.status_code, 202)
+        self.serre_mock.forcer_relais.assert_called_once_with('ventilation', True, 600.0)
+
+    def test_forcer_relais_invalide(self):
+        response = self.client.post('/api/serre/relais/inconnu', json={"etat": True, "duree": 60})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post('/api/serre/relais/chauffage', json={"etat": "oui", "duree": 60})
+        self.assertEqual(response.status_code, 400)
+        for durée in (0, -5, 1e9):
+            response = self.client.post('/api/serre/relais/chauffage', json={"etat": True, "duree": durée})
+            self.assertEqual(response.status_code, 400)
+        self.serre_mock.forcer_relais.assert_not_called()
+
+    def test_forcer_relais_file_pleine(self):
+        import queue
+        from services.etat_partage_service import SerreDistante
+        file = queue.Queue(maxsize=1)
+        file.put(("actualiser", {}))
+        self.api.serre = SerreDistante(Mock(), file)
+        response = self.client.post('/api/serre/relais/chauffage', json={"etat": True, "duree": 60})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.client.delete('/api/serre/relais/chauffage').status_code, 503)
@@ -5,9 +5,24 @@ import signal
 import shutil
 from pathlib import Path
 import tempfile
-from services.logging_service import ServiceLogging
+import time
+from services.logging_service import ServiceLogging, GestionnaireIndexé, IndexJournaux
 from services.pushover_service import ServicePushover, NotificationMessage
-from services.systemd_service import ServiceSystemd
+from services.limitation_service import LimiteurAlertes
+from services.statistiques_service import StatistiqueGlissante
+from services.etat_partage_service import ÉtatPartagé, RécepteurCommandes, SerreDistante, ProcessusAPI
+from models.exceptions import ErreurConfiguration
+from models.donnees_environnement import DonnéesEnvironnement
+from services.historique_service import HistoriqueSerre, RELAIS
+from services.flotte_service import AgrégateurFlotte
+from services.memoire_service import ServiceMémoire
+from services.systemd_service import ServiceSystemd, SurveillanceÉchéance
+from services.cache_service import CacheLectureUnique
+from services.energie_service import ServiceÉnergie, SérieCyclique
+from services.serialisation_service import EncodeurJSON, FragmentJSON, négocier_encodage
+from config import API_CONFIG
+from services.prevision_service import ServicePrévision, np
+from services.materiel_service import CapteurFactice
 
 
 
@@ -24,16 +39,132 @@ class TestServiceLogging(unittest.TestCase):
         self.assertIsInstance(logger, logging.Logger)
         self.assertEqual(logger.name, "test")
 
+    def test_index_journaux(self):
+        """Test de la recherche indexée à travers les rotations."""
+        dossier = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, dossier)
+        gestionnaire = GestionnaireIndexé(dossier / "serre.log", maxBytes=2000, backupCount=50)
+        gestionnaire.setFormatter(logging.Formatter('%(name)s - %(levelname)s - %(message)s'))
+        loggers = [logging.getLogger("test.index.controller"), logging.getLogger("test.index.pushover")]
+        for logger in loggers:
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            logger.addHandler(gestionnaire)
+            self.addCleanup(logger.removeHandler, gestionnaire)
+        self.addCleanup(gestionnaire.close)
+        for i in range(200):
+            loggers[i % 2].info(f"lecture {i}")
+            if i % 10 == 0:
+                loggers[0].warning(f"alerte {i}", extra={"evenement": "alerte"})
+        self.assertTrue((dossier / "serre.log.3.idx").exists())
+
+        index = IndexJournaux(dossier / "serre.log")
+        alertes = index.rechercher(niveau="WARNING")["journaux"]
+        self.assertEqual([a["message"] for a in alertes], [
+            f"test.index.controller - WARNING - alerte {i}" for i in range(0, 200, 10)
+        ])
+        self.assertEqual({a["evenement"] for a in alertes}, {"alerte"})
+        self.assertEqual(len(index.rechercher(logger="test.index.pushover", limite=1000)["journaux"]), 100)
+        self.assertEqual(len(index.rechercher(contient="lecture 19", limite=1000)["journaux"]), 11)
+
+        messages, curseur = [], None
+        while True:
+            page = index.rechercher(logger="test.index.controller", limite=7, curseur=curseur)
+            messages += [j["message"] for j in page["journaux"]]
+            curseur = page["suivant"]
+            if curseur is None:
+                break
+        self.assertEqual(len(messages), 120)
+        self.assertEqual(len(set(messages)), 120)
+
+    def test_index_entree_partielle(self):
+        """Test de la reprise après une entrée d'index et un nom interrompus par un arrêt brutal."""
+        dossier = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, dossier)
+        chemin = dossier / "serre.log"
+        logger = logging.getLogger("test.index.partiel")
+        logger.propagate = False
+
+        def journaliser(messages):
+            gestionnaire = GestionnaireIndexé(chemin, maxBytes=0, backupCount=0)
+            logger.addHandler(gestionnaire)
+            for message in messages:
+                logger.warning(message)
+            logger.removeHandler(gestionnaire)
+            gestionnaire.close()
+
+        journaliser(["alerte 1", "alerte 2"])
+        with open(dossier / "serre.log.idx", "ab") as index:
+            index.write(b"\x00" * 7)
+        with open(dossier / "serre.log.noms", "ab") as noms:
+            noms.write(b"test.inter")
+        self.assertEqual(len(IndexJournaux(chemin).rechercher(niveau="WARNING")["journaux"]), 2)
+
+        journaliser(["alerte 3"])
+        self.assertEqual(
+            [j["message"] for j in IndexJournaux(chemin).rechercher(niveau="WARNING")["journaux"]],
+            ["alerte 1", "alerte 2", "alerte 3"]
+        )
+        self.assertEqual((dossier / "serre.log.noms").read_text(encoding="utf-8").splitlines(),
+                         ["test.index.partiel", "journaliser"])
+
 class TestServicePushover(unittest.TestCase):
 
     def setUp(self):
-        self.service = ServicePushover()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.fichier = Path(self.temp_dir) / "limitation.json"
+        self.service = ServicePushover(LimiteurAlertes(30, fichier=self.fichier))
 
     def test_rate_limiting(self):
         """Test du rate limiting."""
         self.assertTrue(self.service.peut_envoyer_alerte("test"))
         self.assertFalse(self.service.peut_envoyer_alerte("test"))
 
+    def test_limitation_persistante(self):
+        """Test de la persistance de la limitation après redémarrage."""
+        self.assertTrue(self.service.peut_envoyer_alerte("temp_basse", 15.0))
+        redémarré = ServicePushover(LimiteurAlertes(30, fichier=self.fichier))
+        self.assertFalse(redémarré.peut_envoyer_alerte("temp_basse", 14.2))
+
+    def test_occurrences_notees_persistantes(self):
+        """Test de la persistance des occurrences notées sans envoi, réduites en parallèle."""
+        import threading
+        limiteur = LimiteurAlertes(30, fichier=self.fichier, max_événements=4096)
+        réductions = threading.Thread(
+            target=lambda: [limiteur.réduire(0.9, minimum=2048) for _ in range(50)]
+        )
+        réductions.start()
+        for i in range(200):
+            limiteur.noter(f"type_{i % 8}", float(i))
+        réductions.join()
+        redémarré = LimiteurAlertes(30, fichier=self.fichier)
+        self.assertTrue(redémarré.résumé("type_0").startswith("type_0 25 fois"))
+
+    def test_seau_jetons_et_resume(self):
+        """Test de la recharge du seau et du résumé de fenêtre."""
+        limiteur = LimiteurAlertes(30, rafale=2, fenêtre=3600)
+        self.assertTrue(limiteur.autoriser("temp_basse", 15.0, maintenant=1000.0))
+        self.assertTrue(limiteur.autoriser("temp_basse", 14.2, maintenant=1001.0))
+        self.assertFalse(limiteur.autoriser("temp_basse", 14.5, maintenant=1002.0))
+        self.assertTrue(limiteur.autoriser("temp_basse", 14.8, maintenant=1040.0))
+        self.assertEqual(
+            limiteur.résumé("temp_basse", "°C", maintenant=1040.0),
+            "temp_basse 4 fois en 60 min, min 14.2 °C, max 15.0 °C"
+        )
+        self.assertIsNone(limiteur.résumé("temp_basse", maintenant=5000.0))
+
+    def test_eviction_types(self):
+        """Test de la mémoire bornée des types d'alerte."""
+        limiteur = LimiteurAlertes(30, max_types=2, max_événements=3)
+        for i in range(5):
+            limiteur.autoriser("a", float(i), maintenant=float(i))
+        limiteur.autoriser("b", maintenant=10.0)
+        limiteur.autoriser("c", maintenant=11.0)
+        self.assertEqual(list(limiteur.exporter()), ["b", "c"])
+        limiteur.autoriser("b", maintenant=12.0)
+        self.assertEqual(len(limiteur.exporter()["b"]["evenements"]), 2)
+
     @patch('http.client.HTTPSConnection')
     def test_envoi_notification(self, mock_conn):
         """Test d'envoi de notification."""
@@ -44,6 +175,536 @@ class TestServicePushover(unittest.TestCase):
         notification = NotificationMessage("Test", priorité=0)
         self.assertTrue(self.service.envoyer_notification(notification))
 
+class TestStatistiqueGlissante(unittest.TestCase):
+
+    def test_min_max_fenetre(self):
+        """Test des min/max glissants."""
+        stat = StatistiqueGlissante(alpha=0.5, fenêtre_min_max=120, fenêtre_pente=600)
+        for t, v in [(0, 20.0), (60, 15.0), (120, 25.0), (180, 22.0), (240, 21.0)]:
+            stat.ajouter(t, v)
+        self.assertEqual(stat.minimum, 21.0)
+        self.assertEqual(stat.maximum, 25.0)
+
+    def test_pente_et_ewma(self):
+        """Test de la pente et de l'EWMA."""
+        stat = StatistiqueGlissante(alpha=0.5, fenêtre_min_max=3600, fenêtre_pente=600)
+        stat.ajouter(0, 20.0)
+        stat.ajouter(60, 22.0)
+        self.assertEqual(stat.ewma, 21.0)
+        for i in range(2, 20):
+            stat.ajouter(i * 60, 20.0 - 0.3 * i)
+        self.assertAlmostEqual(stat.pente * 600, -3.0)
+        self.assertAlmostEqual(stat.variation_fenêtre(), -3.0)
+
+    def test_recentrage_stable(self):
+        """Test de la stabilité numérique sur une longue durée."""
+        stat = StatistiqueGlissante(alpha=0.2, fenêtre_min_max=3600, fenêtre_pente=600)
+        for i in range(200_000):
+            stat.ajouter(i * 60.0, 18.0 + 0.01 * i)
+        self.assertAlmostEqual(stat.pente * 60, 0.01, places=6)
+
+
+class TestÉtatPartagé(unittest.TestCase):
+
+    def setUp(self):
+        self.écrivain = ÉtatPartagé(taille=4096)
+        self.addCleanup(self.écrivain.fermer)
+        self.lecteur = ÉtatPartagé(nom=self.écrivain.nom)
+        self.addCleanup(self.lecteur.fermer)
+
+    def test_publication_lecture(self):
+        """Test de la lecture d'un état publié par un autre attachement."""
+        self.assertIsNone(self.lecteur.lire())
+        self.assertTrue(self.écrivain.publier({"temperature": "20.0", "chauffage": True}))
+        self.assertEqual(self.lecteur.lire(), {"temperature": "20.0", "chauffage": True})
+        self.assertFalse(self.écrivain.publier({"x": "a" * 5000}))
+
+    def test_ecriture_en_cours(self):
+        """Test du seqlock: une séquence impaire bloque la lecture."""
+        self.écrivain.publier({"temperature": "20.0"})
+        import struct
+        struct.pack_into("<Q", self.écrivain._shm.buf, 0, 3)
+        with self.assertRaises(ErreurConfiguration):
+            self.lecteur.lire(tentatives=10)
+
+    def test_commandes(self):
+        """Test de l'acheminement des commandes vers le contrôle."""
+        import queue
+        file = queue.Queue()
+        gestionnaire = Mock()
+        récepteur = RécepteurCommandes(file, {"forcer": gestionnaire})
+        récepteur.démarrer()
+        SerreDistante(self.lecteur, file).envoyer_commande("forcer", nom="chauffage")
+        récepteur.arrêter()
+        gestionnaire.assert_called_once_with(nom="chauffage")
+
+    def test_arret_file_pleine(self):
+        """Test d'un arrêt non bloquant quand la file de commandes est pleine."""
+        import queue
+        file = queue.Queue(maxsize=2)
+        gestionnaire = Mock()
+        file.put(("forcer", {}))
+        file.put(("forcer", {}))
+        RécepteurCommandes(file, {"forcer": gestionnaire}).arrêter()
+        récepteur = RécepteurCommandes(file, {"forcer": gestionnaire})
+        récepteur.démarrer()
+        début = time.monotonic()
+        récepteur.arrêter()
+        self.assertLess(time.monotonic() - début, 3)
+        self.assertEqual(gestionnaire.call_count, 2)
+        self.assertFalse(récepteur._thread.is_alive())
+
+    def test_relance_processus_api(self):
+        """Test de la relance du processus API après un arrêt inattendu."""
+        processus = ProcessusAPI(self.écrivain)
+        self.assertFalse(processus.surveiller())
+        processus._processus = Mock(exitcode=1, is_alive=Mock(return_value=False))
+        with patch.object(processus, "démarrer") as démarrer:
+            self.assertTrue(processus.surveiller())
+        démarrer.assert_called_once()
+        self.assertEqual(processus.redémarrages, 1)
+
+    def test_lecture_fraiche_distante(self):
+        """Test d'une lecture fraîche demandée au processus de contrôle."""
+        import queue
+        file = queue.Queue()
+        récepteur = RécepteurCommandes(file, {
+            "actualiser": lambda: self.écrivain.publier({"temperature": "21.0"})
+        })
+        récepteur.démarrer()
+        self.addCleanup(récepteur.arrêter)
+        self.écrivain.publier({"temperature": "20.0"})
+        distante = SerreDistante(self.lecteur, file)
+        self.assertEqual(distante.obtenir_état(frais=True), {"temperature": "21.0"})
+
+
+class TestSérialisation(unittest.TestCase):
+
+    def test_fragments(self):
+        """Test de l'insertion d'un fragment JSON déjà encodé."""
+        import json
+        encodeur = EncodeurJSON()
+        valeur = {"nom": "é", "etat": FragmentJSON(b'{"temperature":"20.0"}')}
+        self.assertEqual(json.loads(encodeur.encoder(valeur)), {"nom": "é", "etat": {"temperature": "20.0"}})
+        self.assertEqual(encodeur.encoder({"a": [1, 2.5]}), b'{"a":[1,2.5]}')
+
+    def test_negociation(self):
+        """Test du choix du codage selon Accept-Encoding."""
+        self.assertIsNone(négocier_encodage(None))
+        self.assertIsNone(négocier_encodage("identity"))
+        self.assertEqual(négocier_encodage("deflate, gzip"), "gzip")
+        self.assertEqual(négocier_encodage("gzip;q=0.5, deflate"), "deflate")
+        self.assertIsNone(négocier_encodage("gzip;q=0, deflate;q=0"))
+        self.assertIn(négocier_encodage("*"), ("br", "gzip"))
+
+
+class TestServiceÉnergie(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.fichier = Path(self.temp_dir) / "energie.bin"
+        self.t = 1_717_243_200.0
+
+    def _service(self):
+        service = ServiceÉnergie(fichier=self.fichier, horloge=lambda: self.t)
+        return service
+
+    def test_serie_cyclique(self):
+        """Test de la répartition d'un intervalle sur plusieurs périodes."""
+        série = SérieCyclique(4, 3600)
+        série.ajouter(3000.0, 8000.0)
+        self.assertEqual(série.rapports(10800.0), [0.1667, 1.0, 0.2222, 0.0])
+        self.assertEqual(série.rapports(100 * 3600.0), [0.0] * 4)
+
+    def test_comptage_et_persistance(self):
+        """Test du cumul, des commutations et de la reprise après redémarrage."""
+        service = self._service()
+        service.commuter('chauffage', True)
+        self.t += 1800
+        service.commuter('chauffage', True)
+        self.t += 1800
+        service.commuter('chauffage', False)
+        self.t += 600
+        relais = service.to_dict()["relais"]['chauffage']
+        self.assertEqual(relais["commutations"], 2)
+        self.assertAlmostEqual(relais["duree_h"], 1.0)
+        self.assertAlmostEqual(relais["energie_kwh"], float(relais["puissance_w"]) / 1000)
+        self.assertAlmostEqual(sum(relais["rapport_cyclique_heures"]) * 3600, 3600, delta=1)
+
+        service.commuter('brumisation', True)
+        self.t += 900
+        service.sauvegarder()
+        self.t += 3600
+        reprise = self._service()
+        self.assertTrue(reprise.compteurs['brumisation'].actif)
+        # Relais éteint au redémarrage: compté jusqu'à la dernière sauvegarde seulement
+        reprise.reprendre('brumisation', False)
+        relais = reprise.to_dict()["relais"]
+        self.assertFalse(relais['brumisation']["actif"])
+        self.assertAlmostEqual(relais['brumisation']["duree_h"], 0.25)
+        self.assertEqual(relais['brumisation']["commutations"], 2)
+        self.assertEqual(relais['chauffage']["commutations"], 2)
+        self.assertAlmostEqual(relais['chauffage']["duree_h"], 1.0)
+        # Redémarrage à chaud, relais resté actif: interruption comptée, sans commutation
+        relancé = self._service()
+        relancé.reprendre('brumisation', True)
+        self.assertAlmostEqual(relancé.to_dict()["relais"]['brumisation']["duree_h"], 1.25)
+        self.assertEqual(relancé.to_dict()["relais"]['brumisation']["commutations"], 1)
+        self.assertIn('serre_relais_commutations_total{relais="chauffage"} 2', service.métriques())
+
+    def test_redemarrage_propre(self):
+        """Test d'un arrêt propre puis d'un redémarrage: extinction et rallumage comptés."""
+        service = self._service()
+        service.commuter('chauffage', True)
+        self.t += 1800
+        service.commuter('chauffage', False)
+        service.sauvegarder()
+        self.t += 600
+        relancé = self._service()
+        relancé.reprendre('chauffage', True)
+        self.t += 1800
+        relais = relancé.to_dict()["relais"]['chauffage']
+        self.assertEqual(relais["commutations"], 3)
+        self.assertAlmostEqual(relais["duree_h"], 1.0)
+
+
+@unittest.skipUnless(np, "NumPy non installé")
+class TestServicePrévision(unittest.TestCase):
+
+    def setUp(self):
+        self.t = 1_717_200_000.0
+        self.prévision = ServicePrévision(horloge=lambda: self.t)
+        self.générateur = np.random.default_rng(0)
+
+    def _simuler(self, durée: float, température: float = 15.0) -> float:
+        """Serre synthétique: extérieur sinusoïdal, chauffage en tout-ou-rien sous 14°C."""
+        fin = self.t + durée
+        while self.t < fin:
+            extérieur = 10 + 8 * np.sin(2 * np.pi * (self.t % 86400) / 86400)
+            chauffage = température < 14.0
+            self.prévision.ajouter(température, chauffage, False, t=self.t)
+            température += 60 * (0.0004 * (extérieur - température) + (0.001 if chauffage else 0.0))
+            température += self.générateur.normal(0, 0.02)
+            self.t += 60
+        return température
+
+    def test_ajustement(self):
+        """Test de l'apprentissage de l'effet du chauffage et de la tenue du délai."""
+        self.assertIsNone(self.prévision.prévoir(15.0))
+        température = self._simuler(2 * 86400)
+        self.assertIsNotNone(self.prévision.coefficients)
+        self.assertLess(self.prévision.rmse, 0.5)
+        self.assertLess(self.prévision.durée_ajustement, 0.05)
+        libre = self.prévision.prévoir(température)
+        chauffée = self.prévision.prévoir(température, chauffage=True)
+        # 0,06°C/min de chauffage sur 45 min, amortis par les pertes (constante de temps 2500 s)
+        self.assertAlmostEqual(chauffée - libre, 1.65, delta=0.3)
+
+    def test_reduction(self):
+        """Test de la réduction de la fenêtre par la surveillance mémoire."""
+        température = self._simuler(86400)
+        self.assertEqual(len(self.prévision._échantillons), 1440)
+        self.assertTrue(self.prévision.réduire(0.5, minimum=10))
+        self.assertEqual(len(self.prévision._échantillons), 720)
+        self._simuler(3600, température)
+        self.assertEqual(len(self.prévision._échantillons), 720)
+        # Jamais sous le nombre de lectures nécessaire à l'ajustement
+        self.assertTrue(self.prévision.réduire(0.25, minimum=10))
+        self.assertFalse(self.prévision.réduire(0.5, minimum=10))
+        # 360 points plus 60 lectures d'une minute pour le retard et l'horizon
+        self.assertEqual(len(self.prévision._échantillons), 420)
+        self.assertTrue(self.prévision.ajuster())
+
+
+class TestCapteurFactice(unittest.TestCase):
+
+    def test_derive(self):
+        """Test d'une dérive comptée depuis la création, et non depuis l'époque Unix."""
+        horloge = Mock(return_value=1_717_243_200.0)
+        stable = CapteurFactice(graine=3, horloge=horloge, amplitude=0.0)
+        dérivant = CapteurFactice(graine=3, horloge=horloge, amplitude=0.0, dérive=-0.5)
+        self.assertAlmostEqual(dérivant.lire()['température'], stable.lire()['température'])
+        horloge.return_value += 4 * 3600
+        self.assertAlmostEqual(
+            dérivant.lire()['température'], stable.lire()['température'] - 2.0, places=6
+        )
+
+
+class TestCacheLectureUnique(unittest.TestCase):
+
+    def setUp(self):
+        self.t = 0.0
+        self.cache = CacheLectureUnique(5, 60, 0.05, horloge=lambda: self.t)
+
+    def test_ttl(self):
+        """Test de la réutilisation d'une valeur pendant sa durée de vie."""
+        charger = Mock(side_effect=[1, 2])
+        self.assertEqual(self.cache.obtenir(charger), 1)
+        self.t = 4.0
+        self.assertEqual(self.cache.obtenir(charger), 1)
+        self.t = 6.0
+        self.assertEqual(self.cache.obtenir(charger), 2)
+        self.assertEqual(charger.call_count, 2)
+
+    def test_appel_unique(self):
+        """Test du partage d'un chargement en cours entre appelants concurrents."""
+        import threading
+        charger = Mock(side_effect=lambda: time.sleep(0.1) or 42)
+        résultats = []
+        threads = [
+            threading.Thread(target=lambda: résultats.append(self.cache.obtenir(charger)))
+            for _ in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(résultats, [42] * 20)
+        self.assertEqual(charger.call_count, 1)
+
+    def test_perime_si_lent(self):
+        """Test du renvoi de la valeur périmée pendant un rechargement lent."""
+        import threading
+        self.cache.obtenir(lambda: 1)
+        self.t = 10.0
+        libérer = threading.Event()
+        self.assertEqual(self.cache.obtenir(lambda: libérer.wait() and 2, périmé_accepté=True), 1)
+        libérer.set()
+        # Le rechargement en cours est rejoint plutôt que relancé
+        self.assertEqual(self.cache.obtenir(Mock(side_effect=ValueError("panne"))), 2)
+
+
+class TestHistoriqueSerre(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.historique = HistoriqueSerre(Path(self.temp_dir))
+        self.historique.taille_bloc = 7
+        données = DonnéesEnvironnement(température=20.0, humidité=50.0, pression=1013.0)
+        # Trois jours d'enregistrements toutes les 2 heures
+        self.début = 1_700_000_000.0
+        for i in range(36):
+            self.historique.enregistrer(
+                données, {"chauffage": i % 2 == 0}, False, horodatage=self.début + i * 7200
+            )
+
+    def test_lecture_intervalle(self):
+        """Test de la lecture par blocs d'un intervalle couvrant plusieurs jours."""
+        blocs = list(self.historique.lire(self.début + 7200, self.début + 30 * 7200))
+        self.assertTrue(all(len(bloc) <= 7 for bloc in blocs))
+        horodatages = [e[0] for bloc in blocs for e in bloc]
+        self.assertEqual(horodatages, [self.début + i * 7200 for i in range(1, 30)])
+
+    def test_enregistrement_partiel(self):
+        """Test de la reprise après un enregistrement interrompu en cours d'écriture."""
+        from datetime import datetime, timezone
+        dernier = self.début + 35 * 7200
+        fichier = self.historique._fichier(datetime.fromtimestamp(dernier, timezone.utc).date())
+        with open(fichier, "ab") as f:
+            f.write(b"\x00" * 7)
+        redémarré = HistoriqueSerre(Path(self.temp_dir))
+        données = DonnéesEnvironnement(température=21.0, humidité=50.0, pression=1013.0)
+        for i in (1, 2):
+            redémarré.enregistrer(données, {}, False, horodatage=dernier + i * 60)
+        horodatages = [e[0] for bloc in redémarré.lire(self.début, dernier + 3600) for e in bloc]
+        self.assertEqual(
+            horodatages,
+            [self.début + i * 7200 for i in range(36)] + [dernier + 60, dernier + 120]
+        )
+
+    def test_export_csv_gzip(self):
+        """Test de l'export CSV compressé en flux."""
+        import gzip
+        contenu = b"".join(self.historique.exporter_csv_gzip(self.début, self.début + 4 * 7200))
+        lignes = gzip.decompress(contenu).decode("utf-8").splitlines()
+        self.assertEqual(lignes[0].split(",")[:4], ["horodatage", "temperature", "humidite", "pression"])
+        self.assertEqual(len(lignes), 5)
+        self.assertEqual(lignes[1].split(",")[4 + RELAIS.index("chauffage")], "1")
+
+
+class TestAgrégateurFlotte(unittest.TestCase):
+
+    NOMBRE_SERRES = 500
+
+    async def _ferme(self, requêtes, nombre=None, défaillants=()):
+        """Démarre des serveurs locaux imitant l'API de serres; les défaillants répondent en HTML."""
+        import asyncio
+        import json
+
+        async def servir(lecteur, écrivain, html=False):
+            try:
+                while True:
+                    entêtes = {}
+                    ligne = await lecteur.readline()
+                    if not ligne:
+                        break
+                    while True:
+                        ligne = await lecteur.readline()
+                        if ligne in (b"\r\n", b""):
+                            break
+                        nom, _, valeur = ligne.decode().partition(":")
+                        entêtes[nom.lower()] = valeur.strip()
+                    requêtes.append(entêtes)
+                    if html:
+                        corps = b"<html><body>Erreur proxy</body></html>"
+                        écrivain.write(
+                            b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n'
+                            + f"Content-Length: {len(corps)}\r\n\r\n".encode() + corps
+                        )
+                    elif entêtes.get("if-none-match") == '"v1"':
+                        écrivain.write(b'HTTP/1.1 304 NOT MODIFIED\r\nETag: "v1"\r\n\r\n')
+                    else:
+                        corps = json.dumps({"temperature": "21.5", "humidite": "55.0",
+                                            "mode_securite": False}).encode()
+                        écrivain.write(
+                            b'HTTP/1.1 200 OK\r\nETag: "v1"\r\nContent-Type: application/json\r\n'
+                            + f"Content-Length: {len(corps)}\r\n\r\n".encode() + corps
+                        )
+                    await écrivain.drain()
+            finally:
+                écrivain.close()
+
+        serveurs = [
+            await asyncio.start_server(
+                lambda l, é, html=i in défaillants: servir(l, é, html), "127.0.0.1", 0
+            )
+            for i in range(nombre or self.NOMBRE_SERRES)
+        ]
+        return serveurs, [f"127.0.0.1:{s.sockets[0].getsockname()[1]}" for s in serveurs]
+
+    def test_balayage_flotte(self):
+        """Test d'un balayage de 500 serres en moins de 10 s, avec GET conditionnel."""
+        import asyncio
+
+        async def scénario():
+            requêtes = []
+            serveurs, hôtes = await self._ferme(requêtes)
+            agrégateur = AgrégateurFlotte(hôtes, intervalle=10, timeout=5, gigue=0.1)
+            début = time.monotonic()
+            await agrégateur.balayer()
+            durée_premier = time.monotonic() - début
+            début = time.monotonic()
+            await agrégateur.balayer()
+            durée_second = time.monotonic() - début
+            for hôte in agrégateur.hôtes.values():
+                hôte.connexion.fermer()
+            for serveur in serveurs:
+                serveur.close()
+            return agrégateur, requêtes, durée_premier, durée_second
+
+        agrégateur, requêtes, durée_premier, durée_second = asyncio.run(scénario())
+        statut = agrégateur.statut_flotte()
+        self.assertEqual(statut["en_ligne"], self.NOMBRE_SERRES)
+        self.assertLess(durée_premier, 10)
+        self.assertLess(durée_second, 10)
+        self.assertEqual(len(requêtes), 2 * self.NOMBRE_SERRES)
+        self.assertEqual(sum(1 for r in requêtes if r.get("if-none-match") == '"v1"'),
+                         self.NOMBRE_SERRES)
+        self.assertTrue(all(h.non_modifiés == 1 for h in agrégateur.hôtes.values()))
+        # La réponse 304 prolonge la série avec les dernières valeurs connues
+        détail = agrégateur.détail_hôte(next(iter(agrégateur.hôtes)))
+        self.assertEqual(len(détail["serie"]), 2)
+        self.assertEqual(détail["serie"][0]["temperature"], détail["serie"][1]["temperature"])
+
+    def test_hotes_configures(self):
+        """Test du port par défaut et du rejet d'une serre mal définie."""
+        agrégateur = AgrégateurFlotte(["serre1", "10.0.0.2:5002"])
+        self.assertEqual(agrégateur.hôtes["serre1"].connexion.port, int(API_CONFIG['port']))
+        self.assertEqual(agrégateur.hôtes["10.0.0.2:5002"].connexion.port, 5002)
+        with self.assertRaises(ErreurConfiguration) as contexte:
+            AgrégateurFlotte(["serre2:http"])
+        self.assertIn("serre2:http", str(contexte.exception))
+
+    def test_hote_reponse_invalide(self):
+        """Test d'une serre répondant 200 avec un corps HTML au milieu de la ferme."""
+        import asyncio
+
+        async def scénario():
+            serveurs, hôtes = await self._ferme([], nombre=3, défaillants={1})
+            agrégateur = AgrégateurFlotte(hôtes, timeout=5)
+            await agrégateur.balayer()
+            await agrégateur.balayer()
+            for hôte in agrégateur.hôtes.values():
+                hôte.connexion.fermer()
+            for serveur in serveurs:
+                serveur.close()
+            return agrégateur, hôtes
+
+        agrégateur, hôtes = asyncio.run(scénario())
+        statut = agrégateur.statut_flotte()
+        self.assertEqual(statut["en_ligne"], 2)
+        défaillant = statut["serres"][hôtes[1]]
+        self.assertEqual(défaillant["echecs_consecutifs"], 2)
+        self.assertIn("Corps invalide", défaillant["derniere_erreur"])
+
+    def test_hote_injoignable(self):
+        """Test du décompte des échecs pour une serre injoignable."""
+        import asyncio
+        agrégateur = AgrégateurFlotte(["127.0.0.1:1"], timeout=1)
+        asyncio.run(agrégateur.balayer())
+        statut = agrégateur.statut_flotte()
+        self.assertEqual(statut["en_ligne"], 0)
+        self.assertEqual(statut["serres"]["127.0.0.1:1"]["echecs_consecutifs"], 1)
+
+
+class TestServiceMémoire(unittest.TestCase):
+
+    def test_budget_depasse(self):
+        """Test de la réduction des tampons au-delà du budget."""
+        limiteur = LimiteurAlertes(30, max_événements=100)
+        for i in range(100):
+            limiteur.autoriser("temp_basse", 15.0, maintenant=float(i))
+        service = ServiceMémoire(budget_mo=1)
+        service.enregistrer_réductible("limitation", limiteur)
+        self.assertTrue(service.vérifier_budget())
+        self.assertEqual(len(limiteur.exporter()["temp_basse"]["evenements"]), 50)
+        self.assertEqual(service.statistiques()["reductions"], 1)
+        self.assertFalse(ServiceMémoire(budget_mo=1_000_000).vérifier_budget())
+
+    def test_reduction_bornee(self):
+        """Test du plancher des tampons et de l'absence de réduction sans hausse du RSS."""
+        limiteur = LimiteurAlertes(30, max_événements=100)
+        service = ServiceMémoire(budget_mo=100)
+        service.enregistrer_réductible("limitation", limiteur, minimum=30)
+        with patch('services.memoire_service.rss_mo', return_value=150.0) as rss:
+            self.assertTrue(service.vérifier_budget())
+            self.assertEqual(limiteur.max_événements, 50)
+            self.assertFalse(service.vérifier_budget())
+            self.assertEqual(limiteur.max_événements, 50)
+            for valeur in (160.0, 170.0):
+                rss.return_value = valeur
+                with self.assertLogs("serre.memoire", "INFO") as journaux:
+                    self.assertTrue(service.vérifier_budget())
+            self.assertEqual(limiteur.max_événements, 30)
+            self.assertTrue(any("taille minimale" in ligne for ligne in journaux.output))
+
+    def test_instantane_et_diff(self):
+        """Test des instantanés tracemalloc."""
+        service = ServiceMémoire()
+        self.addCleanup(service.arrêter_traçage)
+        self.assertEqual(service.diff(), [])
+        service.instantané()
+        tampon = [bytearray(1024) for _ in range(1000)]
+        diff = service.diff(top=5)
+        self.assertTrue(any(d["diff_ko"] >= 900 for d in diff))
+        self.assertTrue(service.statistiques()["tracemalloc"])
+        del tampon
+
+    def test_arret_automatique_tracemalloc(self):
+        """Test de l'arrêt de tracemalloc après le délai suivant le dernier instantané."""
+        import tracemalloc
+        service = ServiceMémoire()
+        self.addCleanup(service.arrêter_traçage)
+        service.durée_traçage = 0.1
+        service.instantané()
+        self.assertTrue(tracemalloc.is_tracing())
+        service._arrêt_traçage.join(timeout=2)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(service.diff(), [])
+
+
 class TestServiceSystemd(unittest.TestCase):
     def setUp(self):
         self.temp_dir = tempfile.mkdtemp()
@@ -74,7 +735,7 @@ class TestServiceSystemd(unittest.TestCase):
         
         # Execute test
         with patch('sys.exit') as mock_exit:  # Prevent actual exit
-            self.service._handle_shutdown(signal.SIGTERM, None)
+            self.service._gerer_arret(signal.SIGTERM, None)
             
             # Verify mock calls
             self.cleanup_mock.assert_called_once()
@@ -82,6 +743,56 @@ class TestServiceSystemd(unittest.TestCase):
             self.mock_pid_file.unlink.assert_called_once()
             mock_exit.assert_called_once_with(0)
 
+    def _socket_notification(self):
+        import os
+        import socket
+        chemin = str(Path(self.temp_dir) / "notify.sock")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(chemin)
+        sock.settimeout(2)
+        self.addCleanup(sock.close)
+        env = patch.dict(os.environ, {"NOTIFY_SOCKET": chemin, "WATCHDOG_USEC": "20000"})
+        env.start()
+        self.addCleanup(env.stop)
+        return sock
+
+    def test_notification_systemd(self):
+        """Test de l'envoi sd_notify vers un socket local."""
+        sock = self._socket_notification()
+        self.assertTrue(self.service.notifier("READY=1", "STATUS=ok"))
+        self.assertEqual(sock.recv(1024), b"READY=1\nSTATUS=ok")
+        self.assertEqual(self.service.intervalle_watchdog(), 0.01)
+
+    def test_watchdog_boucle_bloquee(self):
+        """Test de l'arrêt des notifications watchdog lorsque la boucle est bloquée."""
+        sock = self._socket_notification()
+        horloge = Mock(return_value=0.0)
+        surveillance = SurveillanceÉchéance(période=60, échéance=20, marge=30, horloge=horloge)
+        en_retard = Mock()
+        thread = self.service.démarrer_watchdog(surveillance, en_retard)
+        self.assertTrue(sock.recv(1024).startswith(b"WATCHDOG=1"))
+        horloge.return_value = 91.0
+        while not sock.recv(1024).startswith("STATUS=Boucle bloquée".encode()):
+            pass
+        self.service.arret_en_cours = True
+        thread.join(timeout=2)
+        en_retard.assert_called_once()
+        self.assertEqual(surveillance.échéances_manquées, 1)
+
+    def test_surveillance_echeance(self):
+        """Test du décompte des échéances manquées."""
+        horloge = Mock(return_value=0.0)
+        surveillance = SurveillanceÉchéance(période=60, échéance=20, marge=30, horloge=horloge)
+        surveillance.début_cycle()
+        horloge.return_value = 25.0
+        surveillance.fin_cycle()
+        self.assertEqual(surveillance.échéances_manquées, 1)
+        self.assertEqual(surveillance.dernière_latence, 25.0)
+        horloge.return_value = 100.0
+        self.assertTrue(surveillance.dans_les_délais())
+        horloge.return_value = 116.0
+        self.assertFalse(surveillance.dans_les_délais())
+
     def tearDown(self):
         shutil.rmtree(self.temp_dir)
 
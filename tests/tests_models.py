@@ -2,6 +2,7 @@ import unittest
 from datetime import datetime
 from models.donnees_environnement import DonnéesEnvironnement
 from models.exceptions import ErreurValidation
+from models.bail_relais import RegistreBaux
 
 class TestDonnéesEnvironnement(unittest.TestCase):
 
@@ -52,5 +53,28 @@ class TestDonnéesEnvironnement(unittest.TestCase):
         }
         self.assertEqual(donnees.to_dict(), dict_attendu)
 
+class TestRegistreBaux(unittest.TestCase):
+
+    def setUp(self):
+        self.baux = RegistreBaux(durée_max=3600)
+
+    def test_bail_actif_puis_expire(self):
+        self.baux.poser('ventilation', True, 600, maintenant=1000.0)
+        self.assertTrue(self.baux.actif('ventilation', maintenant=1599.0).état)
+        self.assertIn('ventilation', self.baux.to_dict(maintenant=1599.0))
+        self.assertIsNone(self.baux.actif('ventilation', maintenant=1600.0))
+        self.assertEqual(self.baux.to_dict(maintenant=1600.0), {})
+
+    def test_duree_invalide(self):
+        with self.assertRaises(ErreurValidation):
+            self.baux.poser('chauffage', True, 0)
+        with self.assertRaises(ErreurValidation):
+            self.baux.poser('chauffage', True, 7200)
+
+    def test_lever_bail(self):
+        self.baux.poser('chauffage', False, 60)
+        self.assertIsNotNone(self.baux.lever('chauffage'))
+        self.assertIsNone(self.baux.actif('chauffage'))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file